@@ -0,0 +1,118 @@
+"""
+Generates synthetic papers for benchmarking.
+
+LaTeX trees consist of a main file that \\include's N chapter files with
+sections, trigger phrases and M citations, plus an inline thebibliography.
+PDFs are multi-page documents rendered with fpdf2 using a core font.
+
+Run from the project root, e.g.:
+    python -m benchmarks.corpus --out /tmp/corpus --tex-files 40 --citations 2000 --pdf-pages 300
+"""
+import argparse
+import os
+import random
+
+_WORDS = ("the model data analysis results method approach sample effect significant "
+          "measurement observed response treatment control group variable estimate "
+          "performance baseline experiment framework structure process value").split()
+_TRIGGERS = ["Studies show that", "It is known that", "Evidence suggests that",
+             "Research indicates that", "It is widely accepted that"]
+_SECTIONS = ["Introduction", "Methods", "Results", "Discussion"]
+
+def _sentence(rng, citation=None):
+    words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 20)))
+    if rng.random() < 0.1:
+        words = f"{rng.choice(_TRIGGERS)} {words}"
+    else:
+        words = words.capitalize()
+    return f"{words} {citation}." if citation else f"{words}."
+
+def generate_latex_tree(out_dir, files=10, citations=500, bibitems=None, seed=0):
+    """
+    Writes a LaTeX project with `files` included chapter files, `citations`
+    \\cite commands spread across them and `bibitems` bibliography entries
+    (default: 80% of the citations, so some remain unresolved).
+    Returns the path of the main .tex file.
+    """
+    rng = random.Random(seed)
+    bibitems = max(1, int(citations * 0.8)) if bibitems is None else bibitems
+    os.makedirs(out_dir, exist_ok=True)
+    keys = [f"ref{i}" for i in range(max(1, int(bibitems * 1.1)))]
+
+    per_file = [citations // files + (1 if i < citations % files else 0) for i in range(files)]
+    for index, file_citations in enumerate(per_file):
+        lines = [f"\\section{{{_SECTIONS[index % len(_SECTIONS)]}}}"]
+        for _ in range(file_citations):
+            lines.append(_sentence(rng, f"\\cite{{{rng.choice(keys)}}}"))
+            lines.extend(_sentence(rng) for _ in range(3))
+            if rng.random() < 0.05:
+                lines.append(f"% {_sentence(rng)}")
+        with open(os.path.join(out_dir, f"chapter{index}.tex"), 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+    main = ["\\documentclass{article}", "\\title{Synthetic Benchmark Paper}", "\\author{Benchmark Author}",
+            "\\begin{document}", "\\maketitle", "\\begin{abstract}", _sentence(rng), "\\end{abstract}"]
+    main.extend(f"\\include{{chapter{index}}}" for index in range(files))
+    main.append(f"\\begin{{thebibliography}}{{{bibitems}}}")
+    for key in keys[:bibitems]:
+        main.append(f"\\bibitem{{{key}}} A. Author. {rng.choice(_WORDS).capitalize()} study. "
+                    f"Journal of Benchmarks, {rng.randint(1980, 2025)}.")
+    main += ["\\end{thebibliography}", "\\end{document}"]
+    main_path = os.path.join(out_dir, "main.tex")
+    with open(main_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(main) + "\n")
+    return main_path
+
+def generate_pdf(path, pages=100, seed=0):
+    """
+    Writes a PDF of roughly `pages` pages with standard section headings,
+    numeric and author-year citations and a references section at the end.
+    Returns path.
+    """
+    # Imported here so LaTeX-only benchmarks do not need fpdf
+    from fpdf import FPDF
+
+    rng = random.Random(seed)
+    pdf = FPDF()
+    pdf.set_title("Synthetic Benchmark Paper")
+    pdf.set_author("Benchmark Author")
+    pdf.set_font("Helvetica", size=10)
+    pdf.add_page()
+    sections = ["Abstract"] + _SECTIONS
+    body_pages = max(1, pages - max(1, pages // 10))
+    for index, section in enumerate(sections):
+        if index:
+            pdf.ln(4)
+        pdf.multi_cell(0, 5, section, new_x="LMARGIN", new_y="NEXT")
+        while pdf.page_no() < body_pages * (index + 1) / len(sections):
+            citation = rng.choice([None, None, f"[{rng.randint(1, 200)}]", f"(Smith, {rng.randint(1980, 2025)})"])
+            paragraph = " ".join(_sentence(rng, citation if i == 0 else None) for i in range(rng.randint(3, 6)))
+            pdf.multi_cell(0, 5, paragraph, new_x="LMARGIN", new_y="NEXT")
+    pdf.add_page()
+    pdf.multi_cell(0, 5, "References", new_x="LMARGIN", new_y="NEXT")
+    reference = 1
+    while pdf.page_no() < pages:
+        pdf.multi_cell(0, 5, f"[{reference}] A. Author. {rng.choice(_WORDS).capitalize()} study. "
+                             f"Journal of Benchmarks, {rng.randint(1980, 2025)}.", new_x="LMARGIN", new_y="NEXT")
+        reference += 1
+    pdf.output(path)
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', required=True, help="output directory")
+    parser.add_argument('--tex-files', type=int, default=10, help="number of included LaTeX files")
+    parser.add_argument('--citations', type=int, default=500, help="number of \\cite commands")
+    parser.add_argument('--bibitems', type=int, default=None, help="number of \\bibitem entries")
+    parser.add_argument('--pdf-pages', type=int, default=100, help="number of PDF pages")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    tex_path = generate_latex_tree(os.path.join(args.out, "latex"), args.tex_files, args.citations,
+                                   args.bibitems, args.seed)
+    pdf_path = generate_pdf(os.path.join(args.out, "paper.pdf"), args.pdf_pages, args.seed)
+    print(f"LaTeX project: {tex_path}")
+    print(f"PDF: {pdf_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Measures corpus index ingest throughput and query latency at conference
+scale. Synthetic papers cite ~40 works each, drawn from a shared pool with a
+skewed popularity (a few classics, a long tail), and are spread over tracks;
+a few pairs of papers share a planted cluster of rare references.
+
+Run from the project root:
+    python -m benchmarks.corpus_index                       # 20,000 papers
+    python -m benchmarks.corpus_index --papers 50000 --output index_bench.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.corpus_index import CorpusIndex
+
+def synthetic_papers(count, tracks=8, references=40, seed=0):
+    """Yields (path, track, report_data) records for count synthetic papers."""
+    rng = random.Random(seed)
+    pool = count * 5
+    for number in range(count):
+        works = {int(pool * rng.random() ** 3) for _ in range(references)}
+        if number % 1000 == 1:
+            # Planted citation cluster shared with the previous paper
+            works.update(pool + number // 1000 * 10 + offset for offset in range(8))
+        if number % 1000 == 0:
+            works.update(pool + (number + 1) // 1000 * 10 + offset for offset in range(8))
+        report_data = {
+            'metadata': {'title': f"Paper {number}", 'author': "Benchmark Author"},
+            'missing_sections': rng.sample(["Methods", "Results", "Discussion"], rng.randint(0, 1)),
+            'unresolved_citations': [],
+            'missing_citation_sentences': [f"Studies show that claim {number}.{index} holds."
+                                           for index in range(rng.randint(0, 3))],
+            'references': [{'key': str(index), 'text': f"A. Author. Study number {work}. Journal of Benchmarks.",
+                            'year': 1980 + work % 46, 'doi': None} for index, work in enumerate(sorted(works))],
+        }
+        yield f"/corpus/track{number % tracks}/paper{number}.pdf", f"Track {number % tracks}", report_data
+
+def timed(function, repeat=5):
+    """Returns the best wall time of repeat calls in milliseconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--papers', type=int, default=20000, help="papers to ingest (default: 20000)")
+    parser.add_argument('--output', default=None, help="also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = {'papers': args.papers}
+    with tempfile.TemporaryDirectory() as index_dir:
+        index_path = os.path.join(index_dir, "corpus.sqlite")
+        with CorpusIndex(index_path) as index:
+            start = time.perf_counter()
+            index.ingest(synthetic_papers(args.papers))
+            elapsed = time.perf_counter() - start
+            results['ingest_seconds'] = elapsed
+            results['ingest_papers_per_sec'] = args.papers / elapsed
+            results['index_bytes'] = os.path.getsize(index_path)
+            print(f"ingest: {args.papers} papers in {elapsed:.1f}s ({args.papers / elapsed:,.0f} papers/sec), "
+                  f"{results['index_bytes'] // (1024 * 1024)} MB")
+
+            queries = {
+                'most_cited': lambda: index.most_cited(20),
+                'most_cited_track': lambda: index.most_cited(20, track="Track 0"),
+                'age_distribution': lambda: index.age_distribution(),
+                'shared_clusters': lambda: index.shared_clusters(min_shared=5),
+            }
+            for name, query in queries.items():
+                results[f"{name}_ms"] = timed(query)
+                print(f"{name:<18} {results[f'{name}_ms']:>8.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+if __name__ == "__main__":
+    main()
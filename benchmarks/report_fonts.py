@@ -0,0 +1,61 @@
+"""
+Measures per-report render time with cold versus warm font state.
+
+Cold: the parsed fonts are dropped before every report, so each PDFReport
+parses the Roboto TTF files again (the behaviour before fonts were shared).
+Warm: the fonts are parsed once and shared by every report in the process.
+
+Run from the project root:
+    python -m benchmarks.report_fonts --reports 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.report_generator import clear_font_cache, create_report, load_fonts
+
+SAMPLE_REPORT_DATA = {
+    'metadata': {'title': 'A Benchmark Paper', 'author': 'Jane Doe'},
+    'found_sections': ['abstract', 'introduction', 'methods', 'results'],
+    'missing_sections': ['Discussion', 'References'],
+    'unresolved_citations': ['smith2001', 'lee2019'],
+    'unused_references': ['old1999'],
+    'missing_citation_sentences': [f"Studies show that claim {i} holds." for i in range(20)],
+    'average_reference_age': '12.4 years',
+    'old_references_count': 3,
+    'old_references_percentage': '42.9%',
+}
+
+def time_reports(count, output_dir, cold):
+    timings = []
+    for i in range(count):
+        if cold:
+            clear_font_cache()
+        start = time.perf_counter()
+        create_report(SAMPLE_REPORT_DATA, os.path.join(output_dir, f"report_{i}.pdf"))
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reports', type=int, default=20, help="reports rendered per mode (default: 20)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        cold = time_reports(args.reports, output_dir, cold=True)
+        clear_font_cache()
+        load_fonts()
+        warm = time_reports(args.reports, output_dir, cold=False)
+
+    for label, timings in (("cold fonts", cold), ("warm fonts", warm)):
+        mean = sum(timings) / len(timings)
+        print(f"{label}: {mean * 1000:.1f} ms/report (min {min(timings) * 1000:.1f} ms, "
+              f"max {max(timings) * 1000:.1f} ms, {1 / mean:.1f} reports/sec)")
+    print(f"speedup: {sum(cold) / sum(warm):.2f}x")
+
+if __name__ == "__main__":
+    main()
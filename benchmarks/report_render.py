@@ -0,0 +1,74 @@
+"""
+Measures PDF report render time as the number of findings grows, to check
+that rendering scales linearly. Each scenario renders a report whose
+missing-citation list has N sentences (plus N/10 unresolved citations and
+N/10 unused references); entries beyond the inline limit go to the
+appendix table.
+
+Run from the project root:
+    python -m benchmarks.report_render                      # 10, 1,000 and 50,000 findings
+    python -m benchmarks.report_render --findings 10 1000 --inline-limit 0
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.report_generator import DEFAULT_INLINE_LIMIT, create_report, load_fonts
+
+def report_data_with_findings(count):
+    return {
+        'metadata': {'title': 'A Long Survey Paper', 'author': 'Jane Doe'},
+        'found_sections': ['abstract', 'introduction', 'methods', 'results', 'discussion', 'references'],
+        'missing_sections': [],
+        'unresolved_citations': [f"missing{i}" for i in range(count // 10)],
+        'unused_references': [f"unused{i}" for i in range(count // 10)],
+        'missing_citation_sentences': [f"Studies show that finding number {i} holds for every sample in the "
+                                       f"survey, which is a fairly typical sentence length." for i in range(count)],
+        'average_reference_age': '12.4 years',
+        'old_references_count': 3,
+        'old_references_percentage': '42.9%',
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--findings', type=int, nargs='+', default=[10, 1000, 50000],
+                        help="missing-citation sentences per scenario (default: 10 1000 50000)")
+    parser.add_argument('--inline-limit', type=int, default=DEFAULT_INLINE_LIMIT,
+                        help=f"entries listed inline per list; negative for no limit (default: {DEFAULT_INLINE_LIMIT})")
+    parser.add_argument('--output', default=None, help="also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+    inline_limit = None if args.inline_limit < 0 else args.inline_limit
+
+    load_fonts()
+    results = []
+    print(f"{'findings':>9} {'time':>10} {'per 1k findings':>16} {'report size':>12}")
+    with tempfile.TemporaryDirectory() as output_dir:
+        for count in args.findings:
+            report_data = report_data_with_findings(count)
+            report_path = os.path.join(output_dir, f"report_{count}.pdf")
+            start = time.perf_counter()
+            create_report(report_data, report_path, inline_limit=inline_limit)
+            elapsed = time.perf_counter() - start
+            total = count + 2 * (count // 10)
+            result = {
+                'findings': total,
+                'seconds': elapsed,
+                'ms_per_1k_findings': elapsed / total * 1e6 if total else None,
+                'report_bytes': os.path.getsize(report_path),
+            }
+            results.append(result)
+            per_1k = f"{result['ms_per_1k_findings']:.1f} ms" if total else "-"
+            print(f"{total:>9} {elapsed * 1000:>7.1f} ms {per_1k:>16} {result['report_bytes'] // 1024:>9} KB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+if __name__ == "__main__":
+    main()
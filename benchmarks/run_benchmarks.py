@@ -0,0 +1,147 @@
+"""
+Times each analysis stage on a synthetic corpus and records throughput and
+peak memory, so runs can be compared across commits. Peak memory is the
+Python heap measured with tracemalloc; native PyMuPDF allocations are not
+included.
+
+Stages:
+    analyze_pdf_file             full PDF analysis (pages/sec)
+    analyze_tex_file             full LaTeX analysis of an include tree (lines/sec)
+    check_for_missing_citations  the sentence/phrase scan on extracted PDF text (MB/sec)
+    create_report                PDF report rendering (reports/sec)
+
+Run from the project root:
+    python -m benchmarks.run_benchmarks --pdf-pages 300 --tex-files 40 --citations 5000 --output bench.json
+    python -m benchmarks.run_benchmarks --baseline bench.json   # compare against an earlier run
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import generate_latex_tree, generate_pdf
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def measure(stage, function, work, unit, repeat):
+    """
+    Runs function `repeat` times for timing, then once more under tracemalloc
+    for peak memory (kept separate because tracing slows execution down).
+    work is the amount of input processed per call, in `unit`s.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    result = {
+        'stage': stage,
+        'best_seconds': best,
+        'mean_seconds': sum(timings) / len(timings),
+        'work': work,
+        'unit': unit,
+        'throughput': work / best if best > 0 else None,
+        'peak_memory_mb': peak / (1024 * 1024),
+    }
+    print(f"{stage:<30} {best * 1000:10.1f} ms  {result['throughput']:12.1f} {unit}/sec  "
+          f"{result['peak_memory_mb']:8.1f} MB peak")
+    return result
+
+def compare(results, baseline_path):
+    """Prints the time ratio of each stage against a previous results file."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {result['stage']: result for result in baseline.get('results', [])}
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('git_commit') or 'unknown'}):")
+    for result in results:
+        old = previous.get(result['stage'])
+        if old and old['best_seconds'] > 0:
+            ratio = result['best_seconds'] / old['best_seconds']
+            print(f"{result['stage']:<30} {ratio:6.2f}x time ({'slower' if ratio > 1 else 'faster'})")
+
+def run(args, corpus_dir):
+    from src.latex_analyzer import analyze_tex_file
+    from src.pdf_analyzer import analyze_pdf_file, extract_text_and_metadata_pdf
+    from src.report_generator import create_report
+    from src.shared_utils import check_for_missing_citations
+
+    print(f"Generating corpus in {corpus_dir}...")
+    pdf_path = generate_pdf(os.path.join(corpus_dir, "paper.pdf"), args.pdf_pages, args.seed)
+    tex_path = generate_latex_tree(os.path.join(corpus_dir, "latex"), args.tex_files, args.citations,
+                                   args.bibitems, args.seed)
+    tex_lines = 0
+    for name in os.listdir(os.path.dirname(tex_path)):
+        with open(os.path.join(os.path.dirname(tex_path), name), encoding='utf-8') as f:
+            tex_lines += sum(1 for _ in f)
+    text, _ = extract_text_and_metadata_pdf(pdf_path)
+    text_mb = len(text.encode('utf-8')) / (1024 * 1024)
+    report_data = analyze_pdf_file(pdf_path)
+    report_path = os.path.join(corpus_dir, "report.pdf")
+
+    print(f"\n{'stage':<30} {'best':>13}  {'throughput':>21}  {'memory':>13}")
+    return [
+        measure('analyze_pdf_file', lambda: analyze_pdf_file(pdf_path), args.pdf_pages, 'pages', args.repeat),
+        measure('analyze_tex_file', lambda: analyze_tex_file(tex_path), tex_lines, 'lines', args.repeat),
+        measure('check_for_missing_citations', lambda: check_for_missing_citations(text), text_mb, 'MB', args.repeat),
+        measure('create_report', lambda: create_report(report_data, report_path), 1, 'reports', args.repeat),
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pdf-pages', type=int, default=100, help="pages in the synthetic PDF (default: 100)")
+    parser.add_argument('--tex-files', type=int, default=20, help="included LaTeX files (default: 20)")
+    parser.add_argument('--citations', type=int, default=2000, help="\\cite commands in the LaTeX tree (default: 2000)")
+    parser.add_argument('--bibitems', type=int, default=None, help="\\bibitem entries (default: 80%% of citations)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per stage; the best is reported (default: 3)")
+    parser.add_argument('--seed', type=int, default=0, help="corpus random seed (default: 0)")
+    parser.add_argument('--corpus-dir', default=None, help="keep the generated corpus here instead of a temp dir")
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help="machine-readable results file (default: benchmark_results.json)")
+    parser.add_argument('--baseline', default=None, help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    if args.corpus_dir:
+        os.makedirs(args.corpus_dir, exist_ok=True)
+        results = run(args, args.corpus_dir)
+    else:
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            results = run(args, corpus_dir)
+
+    record = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {key: value for key, value in vars(args).items()
+                       if key not in ('output', 'corpus_dir', 'baseline')},
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+        f.write("\n")
+    print(f"\nResults saved to {args.output}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+if __name__ == "__main__":
+    main()
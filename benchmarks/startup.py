@@ -0,0 +1,101 @@
+"""
+Measures CLI cold-start time in fresh interpreters and checks which heavy
+backends each scenario imports, to guard against startup regressions.
+
+Scenarios:
+    help       python main.py --help (argument parsing only)
+    tex-json   analyzing a small LaTeX project with JSON output (must not import fitz or fpdf)
+    pdf-json   analyzing a small PDF with JSON output (must not import fpdf)
+
+The analysis scenarios use the interactive flow (answers are fed on stdin)
+so the whole run happens in the measured process rather than a worker pool.
+
+Exits with status 1 if a scenario imports a backend it must not, or if its
+median time exceeds --max-ms. Run from the project root:
+    python -m benchmarks.startup --runs 10 --max-ms 400
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import generate_latex_tree, generate_pdf
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('fitz', 'fpdf')
+
+# Runs main.py in this interpreter and reports which heavy modules it imported
+_DRIVER = """
+import json, runpy, sys
+sys.argv = ['main.py'] + json.loads(sys.argv[1])
+try:
+    runpy.run_path('main.py', run_name='__main__')
+except SystemExit:
+    pass
+sys.stderr.write('\\nLOADED ' + json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)) + '\\n')
+"""
+
+def run_scenario(name, cli_args, stdin, forbidden, runs):
+    """Times `runs` fresh interpreter launches. Returns a result dict."""
+    driver = _DRIVER.format(heavy=HEAVY_MODULES)
+    timings = []
+    loaded = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, '-c', driver, json.dumps(cli_args)], cwd=PROJECT_ROOT,
+                                   input=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        timings.append(time.perf_counter() - start)
+        loaded = json.loads(completed.stderr.rsplit('LOADED ', 1)[1])
+    unexpected = sorted(set(loaded) & set(forbidden))
+    result = {
+        'scenario': name,
+        'median_ms': statistics.median(timings) * 1000,
+        'min_ms': min(timings) * 1000,
+        'loaded_backends': loaded,
+        'unexpected_backends': unexpected,
+    }
+    print(f"{name:<10} {result['median_ms']:8.1f} ms median  {result['min_ms']:8.1f} ms min  "
+          f"backends: {', '.join(loaded) or '-'}{'  UNEXPECTED: ' + ', '.join(unexpected) if unexpected else ''}")
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help="interpreter launches per scenario (default: 5)")
+    parser.add_argument('--max-ms', type=float, default=None, help="fail if any scenario's median exceeds this")
+    parser.add_argument('--output', default=None, help="also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        tex_path = generate_latex_tree(os.path.join(corpus_dir, "latex"), files=2, citations=20)
+        pdf_path = generate_pdf(os.path.join(corpus_dir, "paper.pdf"), pages=2)
+        report_path = os.path.join(corpus_dir, "report.json")
+        json_args = ['-f', 'json', '--no-cache']
+        # Paper path, report path, then "6" to leave the results menu
+        scenarios = [
+            ('help', ['--help'], None, HEAVY_MODULES),
+            ('tex-json', json_args, f"{tex_path}\n{report_path}\n6\n", HEAVY_MODULES),
+            ('pdf-json', json_args, f"{pdf_path}\n{report_path}\n6\n", ('fpdf',)),
+        ]
+        print(f"{'scenario':<10} {'time':>16}")
+        results = [run_scenario(name, cli_args, stdin, forbidden, args.runs)
+                   for name, cli_args, stdin, forbidden in scenarios]
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    failed = [result['scenario'] for result in results
+              if result['unexpected_backends'] or (args.max_ms is not None and result['median_ms'] > args.max_ms)]
+    if failed:
+        print(f"Startup regression in: {', '.join(failed)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,14 +1,17 @@
 
 
-import fitz  # PyMuPDF
-import re
 import os
-from src.report_generator import create_report
-from datetime import datetime
-from src.shared_utils import check_for_missing_citations, check_structure
-from src.pdf_analyzer import analyze_pdf_file
-from src.latex_analyzer import analyze_tex_file
-from fpdf.errors import FPDFException
+import argparse
+# Analyzer and renderer backends (PyMuPDF, fpdf2) are imported on first use through src.registry,
+# and batch/watch support only when those modes run, to keep startup fast
+from src.document_model import DEFAULT_CITATION_PHRASES
+from src.shared_utils import load_phrase_list, load_section_synonyms
+from src import profiling
+from src.analysis import analyze_file
+from src.budget import describe_timeouts
+from src.registry import supported_formats
+from src.result_cache import DEFAULT_CACHE_SIZE_MB, ResultCache
+from src.report_writers import report_path_for_format, write_report
 
 # --- Display Functions ---
 
@@ -24,7 +27,11 @@ def display_metadata(report_data):
 def display_sections(report_data):
     print("\n--- Sections Found ---")
     found_section_names = report_data.get('found_sections', [])
-    if found_section_names:
+    section_map = report_data.get('section_map')
+    if section_map:
+        for entry in section_map:
+            print(f"- {entry['section'].capitalize()}: \"{entry['heading']}\" (page {entry['page']}, from {entry['source']})")
+    elif found_section_names:
         for section in found_section_names:
             print(f"- {section.capitalize()}")
     else:
@@ -59,13 +66,28 @@ def display_citation_analysis(report_data):
     else:
         print("All bibliography entries seem to be cited in the text.")
 
+def format_location(finding):
+    """Describes where a missing-citation finding is, e.g. 'page 3, Methods' or 'intro.tex line 12'."""
+    parts = []
+    if finding.get('file'):
+        parts.append(f"{finding['file']} line {finding['line']}")
+    elif finding.get('page') is not None:
+        parts.append(f"page {finding['page']}")
+    if finding.get('section'):
+        parts.append(finding['section'])
+    return ", ".join(parts)
+
 def display_missing_citation_check(report_data):
     print("\n--- Missing Citation Check ---")
-    missing_citations = report_data.get('missing_citation_sentences', [])
+    missing_citations = report_data.get('missing_citations')
+    if missing_citations is None:
+        missing_citations = [{'sentence': sentence} for sentence in report_data.get('missing_citation_sentences', [])]
     if missing_citations:
         print("Found sentences that may be missing citations:")
-        for sentence in missing_citations:
-            print(f'- "{sentence}"')
+        for finding in missing_citations:
+            location = format_location(finding)
+            sentence = finding['sentence']
+            print(f'- "{sentence}" ({location})' if location else f'- "{sentence}"')
     else:
         print("No sentences with potential missing citations found.")
 
@@ -77,9 +99,271 @@ def display_reference_age_analysis(report_data):
     else:
         print("Reference age analysis not available or no references found.")
 
+def display_references_check(file_path, report_data):
+    print(f"\n=== {file_path} ===")
+    display_reference_age_analysis(report_data)
+    print(f"Bibliography entries: {len(report_data.get('references', []))}")
+
+def display_diff(diff_data):
+    print("\n--- Version Diff ---")
+    print(f"Old: {diff_data['old']['file']}")
+    print(f"New: {diff_data['new']['file']}")
+    sections = diff_data['sections']
+    print(f"Sections: {sections['unchanged']} unchanged, {len(sections['changed'])} changed or added, "
+          f"{len(sections['removed'])} changed or removed")
+    for label in sections['changed']:
+        print(f"- {label}")
+    reanalyzed = diff_data['reanalyzed']
+    summary = f"Re-analyzed {reanalyzed['units']} of {reanalyzed['of_units']} sections"
+    if 'pages' in reanalyzed:
+        summary += f" and extracted {reanalyzed['pages']} of {reanalyzed['of_pages']} pages"
+    print(summary + " of the new version.")
+
+    for key, title in (('missing_sections', "Missing Sections"), ('unresolved_citations', "Unresolved Citations")):
+        changes = diff_data[key]
+        print(f"\n{title}: {len(changes['fixed'])} fixed, {len(changes['introduced'])} introduced, "
+              f"{len(changes['unchanged'])} unchanged")
+        for status in ('fixed', 'introduced'):
+            for item in changes[status]:
+                print(f"- {status}: {item}")
+
+    changes = diff_data['missing_citations']
+    print(f"\nSentences that may be missing citations: {len(changes['fixed'])} fixed, "
+          f"{len(changes['introduced'])} introduced, {len(changes['unchanged'])} unchanged")
+    for status in ('fixed', 'introduced'):
+        for finding in changes[status]:
+            location = format_location(finding)
+            sentence = finding['sentence']
+            print(f'- {status}: "{sentence}" ({location})' if location else f'- {status}: "{sentence}"')
+
+def display_corpus_query(index, query, track=None, limit=20, min_shared=5):
+    tracks = index.summary()
+    scope = f"track '{track}'" if track is not None else f"{len(tracks)} track(s)"
+    print(f"\n--- Corpus Index: {sum(tracks.values())} papers, {scope} ---")
+    if query == 'most-cited':
+        works = index.most_cited(limit, track)
+        if not works:
+            print("No references indexed.")
+        for rank, work in enumerate(works, 1):
+            print(f"{rank:>3}. {work['text']}: cited by {work['papers']} papers")
+    elif query == 'ages':
+        distribution = index.age_distribution(track)
+        if not distribution:
+            print("No papers indexed.")
+        for track_name, entry in distribution.items():
+            references = entry['references']
+            total = sum(references.values())
+            print(f"\n{track_name or '(no track)'}: {entry['papers']} papers, {total} references")
+            for label, count in references.items():
+                label = f"{label} years" if label != 'unknown' else "unknown year"
+                share = f"{count / total * 100:.1f}%" if total else "-"
+                print(f"  {label:<14} {count:>8} {share:>7}")
+    elif query == 'clusters':
+        clusters = index.shared_clusters(min_shared=min_shared, limit=limit, track=track)
+        if not clusters:
+            print(f"No pairs of papers share {min_shared} or more rarely cited references.")
+        for cluster in clusters:
+            names = [title or os.path.basename(path) for path, title in zip(cluster['papers'], cluster['titles'])]
+            print(f"- {cluster['shared']} shared rare references: {names[0]} <-> {names[1]}")
+            for text in cluster['works']:
+                print(f"    {text}")
+
 # --- Main ---
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Academic Paper Review Helper. Run without arguments for interactive mode, "
+                    "or pass papers, directories or glob patterns for non-interactive batch mode.")
+    parser.add_argument('inputs', nargs='*',
+                        help="PDF/LaTeX files, directories or glob patterns (e.g. 'papers/**/*.pdf') to analyze in batch mode")
+    parser.add_argument('-o', '--output-dir', default='reports',
+                        help="directory for the per-paper reports and the batch summary (default: reports)")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument('--page-workers', type=int, default=None,
+                        help="extract the pages of each PDF in this many parallel processes (useful for very large documents)")
+    parser.add_argument('-f', '--format', dest='formats', action='append', choices=sorted(supported_formats()),
+                        help="report format; repeat for several (default: pdf). 'ndjson' streams one line "
+                             "per paper into reports.ndjson in batch mode")
+    parser.add_argument('--phrases', default=None, metavar='FILE',
+                        help="file of additional trigger phrases for the missing-citation check, one per line")
+    parser.add_argument('--section-synonyms', default=None, metavar='FILE',
+                        help="file of additional PDF section headings, one 'section: heading' per line "
+                             "(e.g. 'methods: study design')")
+    parser.add_argument('--diff', nargs=2, metavar=('OLD', 'NEW'), default=None,
+                        help="compare two versions of a paper and report which findings were fixed, introduced "
+                             "or left unchanged; with '-f json' the diff is also saved in the output directory")
+    parser.add_argument('--references-only', action='store_true',
+                        help="only check the references of the given papers (PDFs read just their references "
+                             "pages) and print their age summary; with '-f json' it is also saved in the output "
+                             "directory")
+    parser.add_argument('--watch', action='store_true',
+                        help="watch a single .tex project and re-analyze only the files that change")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always re-analyze, bypassing the result cache")
+    parser.add_argument('--clear-cache', action='store_true',
+                        help="delete all cached analysis results before running (other files in the cache directory are kept)")
+    parser.add_argument('--cache-dir', default=None,
+                        help="location of the result cache (default: ~/.cache/academic_paper_review_helper)")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE_MB,
+                        help=f"maximum result cache size in MB (default: {DEFAULT_CACHE_SIZE_MB})")
+    parser.add_argument('--serve', action='store_true',
+                        help="run a local analysis service with warm worker processes instead of analyzing files")
+    parser.add_argument('--host', default='127.0.0.1', help="address for --serve to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="port for --serve to listen on (default: 8765)")
+    parser.add_argument('--max-queue', type=int, default=None,
+                        help="jobs --serve queues beyond the running ones before answering 503 (default: 4 per worker)")
+    parser.add_argument('--index', default=None, metavar='FILE',
+                        help="corpus index (SQLite) that every paper analyzed in this run is added to")
+    parser.add_argument('--track', default=None,
+                        help="conference track to file the analyzed papers under in --index, or to limit --query to")
+    parser.add_argument('--query', choices=['most-cited', 'ages', 'clusters'], default=None,
+                        help="answer an aggregate query from --index: the most-cited works, the reference-age "
+                             "distribution per track, or pairs of papers sharing rarely cited references")
+    parser.add_argument('--limit', type=int, default=20, help="rows shown by --query (default: 20)")
+    parser.add_argument('--min-shared', type=int, default=5,
+                        help="rarely cited references two papers must share to be listed by --query clusters "
+                             "(default: 5)")
+    parser.add_argument('--time-budget', type=float, default=None, metavar='SECONDS',
+                        help="stop analyzing a paper after this long and report the partial results")
+    parser.add_argument('--stage-budget', type=float, default=None, metavar='SECONDS',
+                        help="stop any single analysis stage (page extraction, parsing a file, reference "
+                             "extraction, BibTeX lookup) after this long and continue with partial results")
+    parser.add_argument('--profile', action='store_true',
+                        help="print wall time, CPU time, input size and peak allocation per analysis stage")
+    parser.add_argument('--profile-trace', default=None, metavar='FILE',
+                        help="also write the profiled stages as Chrome trace-event JSON (implies --profile)")
+    args = parser.parse_args(argv)
+    args.formats = list(dict.fromkeys(args.formats or ['pdf']))
+    args.profile = args.profile or bool(args.profile_trace)
+    if args.query and not args.index:
+        parser.error("--query needs --index")
+    return args
+
+def ingest_reports(index_path, track, reports):
+    """Adds (path, report_data) pairs to the corpus index at index_path."""
+    from src.corpus_index import CorpusIndex
+    with CorpusIndex(index_path) as index:
+        ingested = index.ingest((path, track, report_data) for path, report_data in reports)
+    print(f"Added {ingested} paper(s) to the corpus index {index_path}")
+
+def query_corpus(args):
+    from src.corpus_index import CorpusIndex
+    with CorpusIndex(args.index) as index:
+        display_corpus_query(index, args.query, args.track, args.limit, args.min_shared)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.profile:
+        return run(args)
+
+    profiling.enable()
+    try:
+        return run(args)
+    finally:
+        stage_records = profiling.records()
+        profiling.print_stage_table(stage_records)
+        if args.profile_trace:
+            profiling.write_chrome_trace(stage_records, args.profile_trace)
+            print(f"Trace saved to {args.profile_trace}")
+
+def run(args):
+    cache = ResultCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    if args.clear_cache:
+        cache.clear()
+        print(f"Cleared result cache at {cache.cache_dir}")
+        if not args.inputs:
+            return 0
+    if args.no_cache:
+        cache = None
+    phrases = None
+    if args.phrases:
+        phrases = DEFAULT_CITATION_PHRASES + load_phrase_list(args.phrases)
+    section_synonyms = None
+    if args.section_synonyms:
+        try:
+            section_synonyms = load_section_synonyms(args.section_synonyms)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            return 2
+
+    if args.query and not args.inputs:
+        query_corpus(args)
+        return 0
+
+    if args.serve:
+        from src.service import serve
+        serve(args.host, args.port, args.workers, args.max_queue, cache, phrases, args.page_workers, args.formats,
+              time_budget=args.time_budget, stage_budget=args.stage_budget, section_synonyms=section_synonyms)
+        return 0
+
+    if args.diff:
+        from src.version_diff import diff_versions
+        missing = [path for path in args.diff if not os.path.exists(path)]
+        if missing:
+            print(f"Error: File not found: {missing[0]}")
+            return 2
+        try:
+            diff_data = diff_versions(args.diff[0], args.diff[1], cache=cache, phrases=phrases,
+                                      section_synonyms=section_synonyms)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 2
+        display_diff(diff_data)
+        if 'json' in args.formats:
+            os.makedirs(args.output_dir, exist_ok=True)
+            name = os.path.splitext(os.path.basename(args.diff[1]))[0]
+            diff_path = os.path.join(args.output_dir, f"{name}_diff.json")
+            write_report(diff_data, diff_path, 'json')
+            print(f"\nDiff saved to {diff_path}")
+        return 0
+
+    if args.references_only:
+        from src.batch import collect_input_files
+        file_paths = collect_input_files(args.inputs)
+        if not file_paths:
+            print("Error: --references-only expects PDF or LaTeX papers.")
+            return 2
+        failed = 0
+        for file_path in file_paths:
+            # A corrupt or unreadable paper is reported and skipped, as in batch mode
+            try:
+                report_data = analyze_file(file_path, cache=cache, phrases=phrases, time_budget=args.time_budget,
+                                           stage_budget=args.stage_budget, references_only=True,
+                                           section_synonyms=section_synonyms)
+            except Exception as e:
+                print(f"Error: {file_path}: {type(e).__name__}: {e}")
+                failed += 1
+                continue
+            display_references_check(file_path, report_data)
+            if 'json' in args.formats:
+                os.makedirs(args.output_dir, exist_ok=True)
+                name = os.path.splitext(os.path.basename(file_path))[0]
+                references_path = os.path.join(args.output_dir, f"{name}_references.json")
+                write_report(report_data, references_path, 'json')
+                print(f"Saved to {references_path}")
+        return 1 if failed else 0
+
+    if args.watch:
+        if len(args.inputs) != 1 or not args.inputs[0].lower().endswith('.tex'):
+            print("Error: --watch expects exactly one main .tex file.")
+            return 2
+        from src.tex_watch import watch_tex_project
+        watch_tex_project(args.inputs[0], phrases=phrases)
+        return 0
+
+    if args.inputs:
+        from src.batch import run_batch
+        results = run_batch(args.inputs, args.output_dir, args.workers, args.page_workers, cache, phrases, args.formats,
+                            time_budget=args.time_budget, stage_budget=args.stage_budget,
+                            section_synonyms=section_synonyms)
+        if args.index:
+            ingest_reports(args.index, args.track,
+                           ((result['path'], result['report_data']) for result in results if not result['error']))
+            if args.query:
+                query_corpus(args)
+        return 1 if not results or any(result['error'] for result in results) else 0
+
     print("Welcome to the Academic Paper Review Helper!")
 
     # Get file path from user
@@ -89,28 +373,36 @@ def main():
         file_path = input("Please enter the full path to your PDF or LaTeX file: ")
 
     # Get output path from user
-    output_path = input("Please enter the desired name for the output PDF report (e.g., report.pdf): ")
+    example = report_path_for_format("report", args.formats[0])
+    output_path = input(f"Please enter the desired name for the output {args.formats[0].upper()} report (e.g., {example}): ")
 
-    _, file_extension = os.path.splitext(file_path)
-
-    report_data = None
-    if file_extension.lower() == '.pdf':
-        report_data = analyze_pdf_file(file_path)
-    elif file_extension.lower() == '.tex':
-        report_data = analyze_tex_file(file_path)
-    else:
-        print(f"Error: Unsupported file type '{file_extension}'. Please provide a .pdf or .tex file.")
-        return
+    try:
+        report_data = analyze_file(file_path, page_workers=args.page_workers, cache=cache, phrases=phrases,
+                                   time_budget=args.time_budget, stage_budget=args.stage_budget,
+                                   section_synonyms=section_synonyms)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
 
     if report_data:
         print("\n--- Analysis Complete! ---")
-        print(f"Report will be saved to {output_path}")
-        try:
-            create_report(report_data, output_path)
-            print(f"Report saved to {output_path}")
-        except FPDFException as e:
-            print(f"Error generating PDF report: {e}")
-            print("This might be due to missing or malformed metadata in the PDF. Please try a different PDF or a LaTeX file.")
+        if args.index:
+            ingest_reports(args.index, args.track, [(file_path, report_data)])
+        if report_data.get('timeouts'):
+            print("Warning: the time budget ran out, so these results are partial:")
+            for line in describe_timeouts(report_data['timeouts']):
+                print(f"- {line}")
+        for output_format in args.formats:
+            # With several formats, each report gets the extension of its format
+            report_path = output_path if len(args.formats) == 1 else report_path_for_format(output_path, output_format)
+            print(f"Report will be saved to {report_path}")
+            try:
+                write_report(report_data, report_path, output_format)
+                print(f"Report saved to {report_path}")
+            except Exception as e:
+                print(f"Error generating {output_format.upper()} report: {e}")
+                if output_format == 'pdf':
+                    print("This might be due to missing or malformed metadata in the PDF. Please try a different PDF or a LaTeX file.")
 
         while True:
             print("\n--- Choose an option to view details ---")
@@ -140,4 +432,4 @@ def main():
                 print("Invalid choice. Please enter a number between 1 and 6.")
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+import hashlib
+import os
+from . import budget
+from .profiling import stage
+from .registry import analyzer_options, get_analyzer, supported_extensions
+
+# Bump whenever a change to the analyzers alters report_data, so stale cache entries are ignored
+ANALYZER_VERSION = "1.9"
+# Analyzer options that do not change report_data, so they are left out of the cache key
+_RESULT_NEUTRAL_OPTIONS = ('page_workers',)
+
+def input_fingerprint(file_path, phrases=None, options=None):
+    """
+    Returns a content hash identifying an analysis input. PDFs are hashed by
+    their bytes; LaTeX files by every file of their include tree (as the
+    analyzer resolves it, see latex_analyzer.tex_dependencies) plus the
+    modification time and size of the .bib files they reference.
+    Custom trigger phrases and analyzer options (a dict) are part of the
+    hash since they change the results.
+    """
+    _, file_extension = os.path.splitext(file_path)
+    digest = hashlib.sha256(f"{ANALYZER_VERSION}\0{file_extension.lower()}\0".encode('utf-8'))
+    if phrases is not None:
+        digest.update("\n".join(sorted(phrases)).encode('utf-8') + b"\0")
+    for name, value in sorted((options or {}).items()):
+        digest.update(f"{name}={value!r}\0".encode('utf-8'))
+    if file_extension.lower() == '.tex':
+        from .latex_analyzer import tex_dependencies
+        base_dir = os.path.dirname(os.path.abspath(file_path))
+        sources, bib_paths = tex_dependencies(file_path)
+        for abs_path, content in sources:
+            digest.update(f"{os.path.relpath(abs_path, base_dir)}\0{content}\0".encode('utf-8'))
+        # The .bib files the analyzer resolves; missing ones count too, so creating one invalidates the entry
+        for bib_path in bib_paths:
+            try:
+                stat = os.stat(bib_path)
+                digest.update(f"{bib_path}:{stat.st_mtime_ns}:{stat.st_size}\0".encode('utf-8'))
+            except FileNotFoundError:
+                digest.update(f"{bib_path}:missing\0".encode('utf-8'))
+    else:
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def analyze_file(file_path, page_workers=None, cache=None, phrases=None, time_budget=None, stage_budget=None,
+                 references_only=False, section_synonyms=None):
+    """
+    Dispatches a paper to the analyzer registered for its file extension,
+    importing that analyzer's backend on first use. page_workers,
+    references_only and section_synonyms are passed on to analyzers that
+    accept them (the PDF analyzer, for sharded page extraction, for the
+    reference-only check that reads just the references pages and for extra
+    section heading synonyms) and phrases to the missing-citation check of
+    every analyzer. Other analyzers ignore these options and run in full.
+    If a ResultCache is given, identical inputs are served from it.
+
+    time_budget and stage_budget (seconds) bound the analysis of the whole
+    document and of each budgeted stage (page extraction, per-file parsing,
+    reference extraction, BibTeX lookups). A stage that runs out of time
+    stops early; the checks then run on what was read, and
+    report_data['timeouts'] lists a marker per stopped stage. Such partial
+    results are not cached.
+    Raises ValueError for unsupported file types.
+    """
+    _, file_extension = os.path.splitext(file_path)
+    if file_extension.lower() not in supported_extensions():
+        raise ValueError(f"Unsupported file type '{file_extension}'. "
+                         f"Please provide a {' or '.join(supported_extensions())} file.")
+
+    options = {'page_workers': page_workers, 'references_only': references_only,
+               'section_synonyms': section_synonyms}
+    options = {name: value for name, value in options.items() if name in analyzer_options(file_extension)}
+    if cache is not None:
+        with stage('cache.lookup'):
+            key = input_fingerprint(file_path, phrases, {name: value for name, value in options.items()
+                                                         if name not in _RESULT_NEUTRAL_OPTIONS and value})
+            report_data = cache.get(key)
+        if report_data is not None:
+            return report_data
+
+    analyzer, _ = get_analyzer(file_extension)
+    with budget.document(time_budget, stage_budget) as timeouts:
+        with stage(f'analyze{file_extension.lower()}', os.path.getsize(file_path)):
+            report_data = analyzer(file_path, phrases=phrases, **options)
+    if timeouts:
+        report_data['timeouts'] = timeouts
+    elif cache is not None:
+        cache.put(key, report_data)
+    return report_data
@@ -0,0 +1,177 @@
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from datetime import datetime
+from . import profiling
+from .analysis import analyze_file
+from .budget import describe_timeouts
+from .registry import supported_extensions
+from .report_writers import append_ndjson_record, report_path_for_format, write_report
+
+def collect_input_files(inputs):
+    """
+    Expands a list of files, directories and glob patterns into a sorted,
+    de-duplicated list of supported paper paths.
+    """
+    found = []
+    extensions = supported_extensions()
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = [os.path.join(item, name) for name in os.listdir(item)]
+        elif glob.has_magic(item):
+            candidates = glob.glob(item, recursive=True)
+        else:
+            candidates = [item]
+        for candidate in candidates:
+            if os.path.isfile(candidate) and os.path.splitext(candidate)[1].lower() in extensions:
+                found.append(os.path.abspath(candidate))
+            elif candidate == item:
+                print(f"Warning: Skipping '{item}' (not a {'/'.join(extensions)} file or directory).")
+    return sorted(set(found))
+
+def _report_paths(file_paths, output_dir):
+    """
+    Assigns a unique report path in output_dir to every input paper. The
+    paths have no extension; each report format adds its own.
+    """
+    used = set()
+    report_paths = {}
+    for file_path in file_paths:
+        stem, extension = os.path.splitext(os.path.basename(file_path))
+        name = f"{stem}_review"
+        if name in used:
+            name = f"{stem}_{extension.lstrip('.').lower()}_review"
+        counter = 2
+        while name in used:
+            name = f"{stem}_review_{counter}"
+            counter += 1
+        used.add(name)
+        report_paths[file_path] = os.path.join(output_dir, name)
+    return report_paths
+
+def process_paper(file_path, report_base, formats=('pdf',), page_workers=None, cache=None, phrases=None,
+                  profile=False, time_budget=None, stage_budget=None, section_synonyms=None):
+    """
+    Analyzes one paper and writes its per-paper reports (report_base plus the
+    extension of each format). Runs inside a worker process, so every failure
+    is caught and returned instead of raised. With profile, the stages
+    recorded for this paper are returned under 'profile'. time_budget,
+    stage_budget and section_synonyms are passed on to analyze_file.
+    """
+    start = time.perf_counter()
+    result = {'path': file_path, 'report_paths': [], 'report_data': None, 'error': None, 'profile': []}
+    with profiling.collect() if profile else nullcontext([]) as stage_records:
+        try:
+            report_data = analyze_file(file_path, page_workers=page_workers, cache=cache, phrases=phrases,
+                                       time_budget=time_budget, stage_budget=stage_budget,
+                                       section_synonyms=section_synonyms)
+            result['report_data'] = report_data
+            for output_format in formats:
+                output_path = report_path_for_format(report_base, output_format)
+                write_report(report_data, output_path, output_format)
+                result['report_paths'].append(output_path)
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+    result['profile'] = stage_records
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+def _summary_line(result):
+    name = os.path.basename(result['path'])
+    if result['error']:
+        return f"FAILED  {name}: {result['error']}"
+    report_data = result['report_data'] or {}
+    status = "PARTIAL" if report_data.get('timeouts') else "OK"
+    return (f"{status:<8}{name}: "
+            f"{len(report_data.get('missing_sections', []))} missing sections, "
+            f"{len(report_data.get('unresolved_citations', []))} unresolved citations, "
+            f"{len(report_data.get('missing_citation_sentences', []))} possibly uncited sentences "
+            f"-> {', '.join(os.path.basename(path) for path in result['report_paths']) or 'no report files'}"
+            + "".join(f"\n        timeout: {line}" for line in describe_timeouts(report_data.get('timeouts', []))))
+
+def write_batch_summary(results, summary_path, elapsed):
+    """Writes a plain-text summary of a batch run, one line per paper."""
+    succeeded = sum(1 for result in results if not result['error'])
+    throughput = len(results) / elapsed if elapsed > 0 else 0.0
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        f.write("Academic Paper Review Helper - Batch Summary\n")
+        f.write(f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"Papers: {len(results)}, succeeded: {succeeded}, failed: {len(results) - succeeded}\n")
+        f.write(f"Elapsed: {elapsed:.1f}s ({throughput:.2f} papers/sec)\n\n")
+        for result in sorted(results, key=lambda r: r['path']):
+            f.write(_summary_line(result) + "\n")
+
+def run_batch(inputs, output_dir, workers=None, page_workers=None, cache=None, phrases=None, formats=('pdf',),
+              profile=None, time_budget=None, stage_budget=None, section_synonyms=None):
+    """
+    Analyzes every paper matched by inputs in a pool of worker processes,
+    writing one report per paper and format plus a batch summary into
+    output_dir. The 'ndjson' format instead streams one line per paper into
+    output_dir/reports.ndjson as results arrive.
+    page_workers additionally shards the pages of each PDF across processes,
+    cache (a ResultCache) lets unchanged papers skip analysis, phrases
+    overrides the trigger phrases of the missing-citation check and
+    section_synonyms adds PDF section heading synonyms.
+    profile (default: whether profiling is enabled in this process) records
+    stages in the workers; they are attached to each result and replayed to
+    this process's profiling listeners, so callers can aggregate them with
+    profiling.collect().
+    time_budget and stage_budget (seconds) bound each paper's analysis; a
+    paper that runs out of time is reported as partial rather than stalling
+    its worker (see analyze_file).
+    Returns the list of per-paper results.
+    """
+    file_paths = collect_input_files(inputs)
+    if not file_paths:
+        print(f"No {' or '.join(supported_extensions())} files found.")
+        return []
+
+    os.makedirs(output_dir, exist_ok=True)
+    report_paths = _report_paths(file_paths, output_dir)
+    paper_formats = tuple(output_format for output_format in formats if output_format != 'ndjson')
+    ndjson_path = os.path.join(output_dir, "reports.ndjson") if 'ndjson' in formats else None
+    if ndjson_path:
+        open(ndjson_path, 'w', encoding='utf-8').close()
+    workers = workers or os.cpu_count() or 1
+    if profile is None:
+        profile = profiling.is_enabled()
+    total = len(file_paths)
+    print(f"Analyzing {total} papers with {workers} worker processes...")
+
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_paper, path, report_paths[path], paper_formats,
+                                   page_workers, cache, phrases, profile, time_budget, stage_budget,
+                                   section_synonyms): path
+                   for path in file_paths}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # A worker that dies abruptly breaks the pool; record the paper instead of aborting the run
+                result = {'path': futures[future], 'report_paths': [], 'report_data': None,
+                          'error': f"{type(e).__name__}: {e}", 'profile': [], 'elapsed': 0.0}
+            results.append(result)
+            profiling.record_stages(result['profile'])
+            if ndjson_path:
+                append_ndjson_record(ndjson_path, {'path': result['path'], 'error': result['error'],
+                                                   'report_data': result['report_data']})
+            elapsed = time.perf_counter() - start
+            if result['error']:
+                status = "FAILED"
+            else:
+                status = "partial (out of time)" if (result['report_data'] or {}).get('timeouts') else "ok"
+            print(f"[{len(results)}/{total}] {os.path.basename(result['path'])}: {status} "
+                  f"({result['elapsed']:.1f}s, {len(results) / elapsed:.2f} papers/sec)")
+
+    elapsed = time.perf_counter() - start
+    summary_path = os.path.join(output_dir, "batch_summary.txt")
+    write_batch_summary(results, summary_path, elapsed)
+    failed = sum(1 for result in results if result['error'])
+    print("\n--- Batch Complete! ---")
+    print(f"{total - failed} of {total} papers analyzed in {elapsed:.1f}s ({total / elapsed:.2f} papers/sec).")
+    print(f"Summary saved to {summary_path}")
+    return results
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import re
+import sqlite3
+import tempfile
+from .result_cache import default_cache_dir
+from .shared_utils import REFERENCE_YEAR
+
+_ENTRY_START = re.compile(r'@\s*([A-Za-z]+)\s*([{(])')
+_FIELD_NAME = re.compile(r'\s*,?\s*([A-Za-z][\w:.-]*)\s*=\s*')
+_BARE_VALUE = re.compile(r'[^,#\s]*')
+# Part of every index's signature; bump when entries are indexed differently
+_INDEX_FORMAT = 2
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+_DELIMITER_TOKENS = {
+    '{': re.compile(r'\\.|[{}]', re.DOTALL),
+    '(': re.compile(r'\\.|[()]', re.DOTALL),
+}
+_CLOSING = {'{': '}', '(': ')'}
+
+def _read_delimited(text, pos, open_char):
+    """Reads a balanced group starting at text[pos] == open_char. Returns (content, end)."""
+    depth = 0
+    close_char = _CLOSING[open_char]
+    for match in _DELIMITER_TOKENS[open_char].finditer(text, pos):
+        token = match.group(0)
+        if token == open_char:
+            depth += 1
+        elif token == close_char:
+            depth -= 1
+            if depth == 0:
+                return text[pos + 1:match.start()], match.end()
+    return text[pos + 1:], len(text)
+
+def _read_value(body, pos):
+    """Reads a field value ({...}, "..." or a bare word, joined with #). Returns (value, end)."""
+    parts = []
+    length = len(body)
+    while pos < length:
+        while pos < length and body[pos].isspace():
+            pos += 1
+        if pos >= length:
+            break
+        if body[pos] == '{':
+            value, pos = _read_delimited(body, pos, '{')
+        elif body[pos] == '"':
+            end = pos + 1
+            depth = 0
+            while end < length and not (body[end] == '"' and depth == 0):
+                depth += {'{': 1, '}': -1}.get(body[end], 0)
+                end += 1
+            value, pos = body[pos + 1:end], end + 1
+        else:
+            match = _BARE_VALUE.match(body, pos)
+            value, pos = match.group(0), match.end()
+        parts.append(value)
+        while pos < length and body[pos].isspace():
+            pos += 1
+        if pos < length and body[pos] == '#':
+            pos += 1
+            continue
+        break
+    return "".join(parts), pos
+
+def parse_bibtex(text):
+    """
+    Parses BibTeX source and yields (key, fields) for every entry, where fields
+    maps lowercase field names to their raw values. @string, @preamble and
+    @comment blocks are skipped.
+    """
+    pos = 0
+    while True:
+        match = _ENTRY_START.search(text, pos)
+        if not match:
+            return
+        entry_type = match.group(1).lower()
+        body, pos = _read_delimited(text, match.end() - 1, match.group(2))
+        if entry_type in ('string', 'preamble', 'comment'):
+            continue
+
+        key, _, rest = body.partition(',')
+        key = key.strip()
+        if not key:
+            continue
+        fields = {}
+        field_pos = 0
+        while True:
+            field_match = _FIELD_NAME.match(rest, field_pos)
+            if not field_match:
+                break
+            value, field_pos = _read_value(rest, field_match.end())
+            fields[field_match.group(1).lower()] = " ".join(value.split())
+        yield key, fields
+
+def _entry_year(fields):
+    """Extracts the publication year from the year field, or from a biblatex date field."""
+    year_match = REFERENCE_YEAR.search(fields.get('year', '')) or REFERENCE_YEAR.search(fields.get('date', ''))
+    return int(year_match.group(0)) if year_match else None
+
+class BibTeXIndex:
+    """
+    Persistent SQLite index of a .bib file mapping citation keys to their
+    year, title and DOI. The index is built once and reused until the .bib
+    file's modification time or size changes, so lookups cost O(keys looked
+    up) rather than O(database size).
+    """
+
+    def __init__(self, bib_path, index_dir=None):
+        self.bib_path = os.path.abspath(bib_path)
+        index_dir = index_dir or os.path.join(default_cache_dir(), 'bibtex')
+        name = hashlib.sha256(self.bib_path.encode('utf-8')).hexdigest()[:32]
+        self.index_path = os.path.join(index_dir, f"{name}.sqlite")
+
+    def _signature(self):
+        stat = os.stat(self.bib_path)
+        return f"{_INDEX_FORMAT}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _is_current(self, signature):
+        if not os.path.exists(self.index_path):
+            return False
+        try:
+            connection = sqlite3.connect(self.index_path)
+            try:
+                row = connection.execute("SELECT value FROM meta WHERE name = 'signature'").fetchone()
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            return False
+        return row is not None and row[0] == signature
+
+    def _build(self, signature):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        with open(self.bib_path, 'r', encoding='utf-8', errors='replace') as f:
+            entries = parse_bibtex(f.read())
+        rows = ((key, _entry_year(fields), fields.get('title'), fields.get('doi')) for key, fields in entries)
+
+        # Build into a temporary file and swap it in, so concurrent readers never see a partial index
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.index_path), suffix='.tmp')
+        os.close(fd)
+        try:
+            connection = sqlite3.connect(tmp_path)
+            with connection:
+                connection.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT)")
+                connection.execute(
+                    "CREATE TABLE entries (key TEXT PRIMARY KEY, year INTEGER, title TEXT, doi TEXT)")
+                connection.executemany("INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?)", rows)
+                connection.execute("INSERT INTO meta VALUES ('signature', ?)", (signature,))
+            connection.close()
+            os.replace(tmp_path, self.index_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _connect(self):
+        signature = self._signature()
+        if not self._is_current(signature):
+            self._build(signature)
+        return sqlite3.connect(self.index_path)
+
+    def lookup(self, keys):
+        """Returns {key: {'year', 'title', 'doi'}} for the given keys found in the database."""
+        keys = list(keys)
+        found = {}
+        connection = self._connect()
+        try:
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                query = f"SELECT key, year, title, doi FROM entries WHERE key IN ({placeholders})"
+                for key, year, title, doi in connection.execute(query, chunk):
+                    found[key] = {'year': year, 'title': title, 'doi': doi}
+        finally:
+            connection.close()
+        return found
+
+    def all_entries(self):
+        """Returns {key: {'year', 'title', 'doi'}} for every entry in the database (used for \\nocite{*})."""
+        connection = self._connect()
+        try:
+            return {key: {'year': year, 'title': title, 'doi': doi}
+                    for key, year, title, doi in connection.execute("SELECT key, year, title, doi FROM entries")}
+        finally:
+            connection.close()
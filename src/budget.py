@@ -0,0 +1,99 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Time budgets are cooperative: long-running loops (pages, files, references)
+# check their limit between units of work and stop early once it has run out,
+# leaving a partial result and a timeout marker instead of stalling the run.
+
+_local = threading.local()
+
+class _Budget:
+    __slots__ = ('seconds', 'stage_seconds', 'deadline', 'timeouts')
+
+    def __init__(self, seconds, stage_seconds):
+        self.seconds = seconds
+        self.stage_seconds = stage_seconds
+        self.deadline = time.perf_counter() + seconds if seconds else None
+        self.timeouts = []
+
+class Limit:
+    """The time limit of one budgeted stage; see limit()."""
+    __slots__ = ('name', 'budget', 'start', 'deadline', 'timed_out')
+
+    def __init__(self, name, budget):
+        self.name = name
+        self.budget = budget
+        self.start = time.perf_counter()
+        self.deadline = self.start + budget.stage_seconds if budget.stage_seconds else None
+        self.timed_out = False
+
+    def expired(self, progress=None):
+        """
+        True once the stage or its document has run out of time. The first
+        time, a timeout marker is recorded for the document; progress (e.g.
+        "12 of 400 pages") describes how much of the stage was completed.
+        """
+        if self.timed_out:
+            return True
+        now = time.perf_counter()
+        budget = self.budget
+        if self.deadline is not None and now >= self.deadline:
+            exceeded, limit_seconds = 'stage', budget.stage_seconds
+        elif budget.deadline is not None and now >= budget.deadline:
+            exceeded, limit_seconds = 'document', budget.seconds
+        else:
+            return False
+        self.timed_out = True
+        budget.timeouts.append({'stage': self.name, 'budget': exceeded, 'limit_seconds': limit_seconds,
+                                'elapsed_seconds': round(now - self.start, 3), 'progress': progress})
+        return True
+
+class _Unlimited:
+    __slots__ = ()
+
+    def expired(self, progress=None):
+        return False
+
+# Returned by limit() when no budget applies
+_UNLIMITED = _Unlimited()
+
+@contextmanager
+def document(seconds=None, stage_seconds=None):
+    """
+    Applies a time budget to the document analyzed in the enclosed block (in
+    this thread): at most `seconds` in total and `stage_seconds` per budgeted
+    stage. Yields the list that receives a timeout marker for every stage
+    that stopped early; it stays empty if everything finished in time.
+    """
+    if not seconds and not stage_seconds:
+        yield []
+        return
+    previous = getattr(_local, 'budget', None)
+    _local.budget = _Budget(seconds, stage_seconds)
+    try:
+        yield _local.budget.timeouts
+    finally:
+        _local.budget = previous
+
+def limit(name):
+    """
+    Starts the limit of a budgeted stage of the current document. Call
+    expired() on the result between units of work; without an active budget
+    it is always False.
+    """
+    budget = getattr(_local, 'budget', None)
+    if budget is None:
+        return _UNLIMITED
+    return Limit(name, budget)
+
+def describe_timeouts(timeouts):
+    """Formats timeout markers as short human-readable lines."""
+    lines = []
+    for marker in timeouts:
+        line = (f"{marker['stage']} stopped after {marker['elapsed_seconds']:.1f}s "
+                f"({marker['budget']} budget of {marker['limit_seconds']:g}s)")
+        if marker.get('progress'):
+            line += f", {marker['progress']} done"
+        lines.append(line)
+    return lines
@@ -0,0 +1,337 @@
+import os
+import re
+import sqlite3
+from collections import Counter
+from itertools import combinations
+from datetime import datetime
+
+# Reference-age buckets of the per-track distribution: (label, lowest age in years)
+AGE_BUCKETS = (('0-2', 0), ('3-5', 3), ('6-10', 6), ('11-20', 11), ('21+', 21))
+# Papers written per transaction while ingesting
+DEFAULT_BATCH_SIZE = 500
+# Works cited by at most this many papers count toward shared-reference
+# clusters; sharing a widely cited work says little about two papers
+RARE_WORK_MAX_PAPERS = 10
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+_NON_WORD = re.compile(r'\W+')
+
+_AGE_COLUMNS = [f"age_bucket_{index}" for index in range(len(AGE_BUCKETS))] + ['age_unknown']
+
+# Aggregates are kept where the queries need them and updated on ingest:
+# works.paper_count and track_works count the papers citing each work (overall
+# and per track), shared_works counts the rare works every pair of papers has
+# in common, and every paper stores its own reference-age histogram. The CLI
+# queries read an index or one row per paper instead of scanning references.
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    track TEXT,
+    title TEXT,
+    author TEXT,
+    ingested_year INTEGER,
+    partial INTEGER,
+    reference_count INTEGER,
+    missing_citation_count INTEGER,
+    {", ".join(f"{column} INTEGER" for column in _AGE_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS papers_track ON papers (track);
+CREATE TABLE IF NOT EXISTS works (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    text TEXT,
+    year INTEGER,
+    paper_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS works_paper_count ON works (paper_count);
+CREATE TABLE IF NOT EXISTS paper_works (
+    paper_id INTEGER NOT NULL,
+    work_id INTEGER NOT NULL,
+    year INTEGER,
+    PRIMARY KEY (paper_id, work_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS paper_works_work ON paper_works (work_id, paper_id);
+CREATE TABLE IF NOT EXISTS track_works (
+    track TEXT NOT NULL,
+    work_id INTEGER NOT NULL,
+    paper_count INTEGER NOT NULL,
+    PRIMARY KEY (track, work_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS track_works_paper_count ON track_works (track, paper_count);
+CREATE TABLE IF NOT EXISTS shared_works (
+    paper_a INTEGER NOT NULL,
+    paper_b INTEGER NOT NULL,
+    shared INTEGER NOT NULL,
+    PRIMARY KEY (paper_a, paper_b)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS shared_works_paper_b ON shared_works (paper_b);
+CREATE INDEX IF NOT EXISTS shared_works_shared ON shared_works (shared) WHERE shared >= 2;
+CREATE TABLE IF NOT EXISTS findings (
+    paper_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS findings_paper ON findings (paper_id);
+CREATE INDEX IF NOT EXISTS findings_kind ON findings (kind, value);
+"""
+
+def work_key(reference):
+    """
+    Identifies the work a report_data 'references' entry cites, across
+    papers: its DOI when known, otherwise its text in lowercase without
+    punctuation. Returns None for an empty entry.
+    """
+    if reference.get('doi'):
+        return f"doi:{reference['doi'].lower()}"
+    text = _NON_WORD.sub(' ', reference.get('text') or '').strip().lower()
+    return f"text:{text}" if text else None
+
+def _age_bucket(age):
+    """Returns the index of the AGE_BUCKETS entry for age, or None for an unknown age."""
+    if age is None:
+        return None
+    for index in range(len(AGE_BUCKETS) - 1, -1, -1):
+        if age >= AGE_BUCKETS[index][1]:
+            return index
+    return 0
+
+class CorpusIndex:
+    """
+    Persistent SQLite index of analyzed papers: their cited works,
+    bibliography years and findings, for statistics across a whole corpus
+    (e.g. a conference track). Papers are keyed by absolute path, so
+    ingesting a paper again replaces its earlier entry.
+    """
+
+    def __init__(self, index_path):
+        self.index_path = os.path.abspath(index_path)
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(self.index_path)
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def ingest(self, papers, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Adds (path, track, report_data) records, writing batch_size papers
+        per transaction. Returns the number of papers ingested.
+        """
+        ingested = 0
+        batch = []
+        for record in papers:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                self._ingest_batch(batch)
+                ingested += len(batch)
+                batch = []
+        if batch:
+            self._ingest_batch(batch)
+            ingested += len(batch)
+        return ingested
+
+    def _select_chunked(self, query, values):
+        """Runs query (with one {placeholders} list) over values in chunks, yielding its rows."""
+        values = list(values)
+        for start in range(0, len(values), _LOOKUP_CHUNK):
+            chunk = values[start:start + _LOOKUP_CHUNK]
+            yield from self.connection.execute(query.format(placeholders=",".join("?" * len(chunk))), chunk)
+
+    def _remove(self, paths):
+        """Deletes the papers at paths (if present), keeping the aggregates in step."""
+        papers = list(self._select_chunked("SELECT id, track FROM papers WHERE path IN ({placeholders})", paths))
+        for paper_id, track in papers:
+            pairs = Counter()
+            cited = self.connection.execute(
+                "SELECT works.id, works.paper_count FROM paper_works "
+                "JOIN works ON works.id = paper_works.work_id WHERE paper_works.paper_id = ?", (paper_id,)).fetchall()
+            for work_id, paper_count in cited:
+                if paper_count == RARE_WORK_MAX_PAPERS + 1:
+                    # The work becomes rare again: its remaining papers share it
+                    others = sorted(other for (other,) in self.connection.execute(
+                        "SELECT paper_id FROM paper_works WHERE work_id = ? AND paper_id != ?", (work_id, paper_id)))
+                    pairs.update(combinations(others, 2))
+            self.connection.executemany("UPDATE works SET paper_count = paper_count - 1 WHERE id = ?",
+                                        ((work_id,) for work_id, _ in cited))
+            if track is not None:
+                self.connection.executemany(
+                    "UPDATE track_works SET paper_count = paper_count - 1 WHERE track = ? AND work_id = ?",
+                    ((track, work_id) for work_id, _ in cited))
+            self.connection.execute("DELETE FROM shared_works WHERE paper_a = ? OR paper_b = ?", (paper_id, paper_id))
+            for table, column in (('paper_works', 'paper_id'), ('findings', 'paper_id'), ('papers', 'id')):
+                self.connection.execute(f"DELETE FROM {table} WHERE {column} = ?", (paper_id,))
+            self._add_shared(pairs)
+
+    def _add_shared(self, pairs):
+        """Adds a Counter of (paper_a, paper_b) -> shared rare works to shared_works."""
+        self.connection.executemany(
+            "INSERT INTO shared_works VALUES (?, ?, ?) "
+            "ON CONFLICT (paper_a, paper_b) DO UPDATE SET shared = shared + excluded.shared",
+            ((paper_a, paper_b, pairs[paper_a, paper_b]) for paper_a, paper_b in sorted(pairs) if pairs[paper_a, paper_b]))
+        self.connection.executemany(
+            "DELETE FROM shared_works WHERE paper_a = ? AND paper_b = ? AND shared <= 0",
+            (pair for pair, shared in pairs.items() if shared < 0))
+
+    def _ingest_batch(self, batch):
+        year = datetime.now().year
+        papers = []
+        works = {}  # work key -> (text, year) of its first occurrence
+        # A path listed twice in one batch keeps its last record
+        latest = {os.path.abspath(path): (track, report_data) for path, track, report_data in batch}
+        for path, (track, report_data) in latest.items():
+            references = {}
+            for reference in report_data.get('references', []):
+                key = work_key(reference)
+                if key is not None and key not in references:
+                    references[key] = reference.get('year')
+                    works.setdefault(key, (reference.get('text'), reference.get('year')))
+            papers.append((path, track, report_data, references))
+
+        with self.connection:
+            self._remove(paper[0] for paper in papers)
+            self.connection.executemany("INSERT OR IGNORE INTO works (key, text, year) VALUES (?, ?, ?)",
+                                        ((key, text, work_year) for key, (text, work_year) in works.items()))
+            work_ids = {}
+            counts = {}  # work id -> papers citing it, updated as the batch is added
+            for key, work_id, paper_count in self._select_chunked(
+                    "SELECT key, id, paper_count FROM works WHERE key IN ({placeholders})", works):
+                work_ids[key] = work_id
+                counts[work_id] = paper_count
+            # Papers citing each work that is still rare, to count the pairs sharing it
+            rare = {work_id: [] for work_id, paper_count in counts.items() if paper_count <= RARE_WORK_MAX_PAPERS}
+            for work_id, paper_id in self._select_chunked(
+                    "SELECT work_id, paper_id FROM paper_works WHERE work_id IN ({placeholders})", rare):
+                rare[work_id].append(paper_id)
+
+            cited = Counter()
+            track_cited = Counter()
+            pairs = Counter()
+            paper_works = []
+            findings = []
+            for path, track, report_data, references in papers:
+                ages = [0] * len(_AGE_COLUMNS)
+                for reference_year in references.values():
+                    bucket = _age_bucket(year - reference_year if reference_year is not None else None)
+                    ages[bucket if bucket is not None else -1] += 1
+                metadata = report_data.get('metadata') or {}
+                missing_citations = report_data.get('missing_citation_sentences', [])
+                cursor = self.connection.execute(
+                    f"INSERT INTO papers (path, track, title, author, ingested_year, partial, reference_count, "
+                    f"missing_citation_count, {', '.join(_AGE_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * (8 + len(_AGE_COLUMNS)))})",
+                    [path, track, metadata.get('title'), metadata.get('author'), year,
+                     int(bool(report_data.get('timeouts'))), len(references), len(missing_citations)] + ages)
+                paper_id = cursor.lastrowid
+                for key, reference_year in references.items():
+                    work_id = work_ids[key]
+                    paper_works.append((paper_id, work_id, reference_year))
+                    cited[work_id] += 1
+                    if track is not None:
+                        track_cited[track, work_id] += 1
+                    others = rare.get(work_id)
+                    if others is None:
+                        pass
+                    elif counts[work_id] < RARE_WORK_MAX_PAPERS:
+                        pairs.update((other, paper_id) for other in others)
+                        others.append(paper_id)
+                    else:
+                        # The work stops being rare: its papers no longer share it
+                        pairs.subtract(combinations(sorted(others), 2))
+                        del rare[work_id]
+                    counts[work_id] += 1
+                findings.extend((paper_id, 'missing_section', value) for value in report_data.get('missing_sections', []))
+                findings.extend((paper_id, 'unresolved_citation', value)
+                                for value in report_data.get('unresolved_citations', []))
+                findings.extend((paper_id, 'missing_citation', value) for value in missing_citations)
+
+            self.connection.executemany("INSERT INTO paper_works VALUES (?, ?, ?)", paper_works)
+            self.connection.executemany("UPDATE works SET paper_count = paper_count + ? WHERE id = ?",
+                                        ((count, work_id) for work_id, count in cited.items()))
+            self.connection.executemany(
+                "INSERT INTO track_works VALUES (?, ?, ?) "
+                "ON CONFLICT (track, work_id) DO UPDATE SET paper_count = paper_count + excluded.paper_count",
+                ((track, work_id, count) for (track, work_id), count in track_cited.items()))
+            self._add_shared(pairs)
+            self.connection.executemany("INSERT INTO findings VALUES (?, ?, ?)", findings)
+
+    # --- Queries ---
+
+    def summary(self):
+        """Returns the number of papers per track."""
+        return dict(self.connection.execute("SELECT track, COUNT(*) FROM papers GROUP BY track ORDER BY track"))
+
+    def most_cited(self, limit=20, track=None):
+        """
+        Returns the works cited by the most papers (of track, if given), as
+        {'text', 'year', 'papers'} dicts.
+        """
+        if track is None:
+            rows = self.connection.execute(
+                "SELECT text, year, paper_count FROM works WHERE paper_count > 0 "
+                "ORDER BY paper_count DESC LIMIT ?", (limit,))
+        else:
+            rows = self.connection.execute(
+                "SELECT works.text, works.year, track_works.paper_count FROM track_works "
+                "JOIN works ON works.id = track_works.work_id "
+                "WHERE track_works.track = ? AND track_works.paper_count > 0 "
+                "ORDER BY track_works.paper_count DESC LIMIT ?", (track, limit))
+        return [{'text': text, 'year': year, 'papers': papers} for text, year, papers in rows]
+
+    def age_distribution(self, track=None):
+        """
+        Returns the reference-age distribution per track as {track: {'papers',
+        'references': {bucket label: count, ..., 'unknown': count}}}. Ages are
+        counted from the year each paper was ingested.
+        """
+        query = f"SELECT track, COUNT(*), {', '.join(f'SUM({column})' for column in _AGE_COLUMNS)} FROM papers"
+        if track is None:
+            rows = self.connection.execute(query + " GROUP BY track ORDER BY track")
+        else:
+            rows = self.connection.execute(query + " WHERE track = ? GROUP BY track", (track,))
+        labels = [label for label, _ in AGE_BUCKETS] + ['unknown']
+        return {row[0]: {'papers': row[1], 'references': dict(zip(labels, (count or 0 for count in row[2:])))}
+                for row in rows}
+
+    def shared_clusters(self, min_shared=5, limit=20, track=None):
+        """
+        Returns pairs of papers (both of track, if given) that cite at least
+        min_shared (and at least two) of the same rarely cited works: works cited by at most
+        RARE_WORK_MAX_PAPERS papers in the whole index, since sharing widely
+        cited works is expected. Each pair is {'papers': (path, path),
+        'titles': (title, title), 'shared', 'works'}, with up to five of the
+        shared works' texts.
+        """
+        if track is None:
+            rows = self.connection.execute(
+                "SELECT paper_a, paper_b, shared FROM shared_works WHERE shared >= 2 AND shared >= ? "
+                "ORDER BY shared DESC LIMIT ?", (min_shared, limit))
+        else:
+            rows = self.connection.execute(
+                "SELECT paper_a, paper_b, shared FROM shared_works "
+                "JOIN papers AS a ON a.id = paper_a AND a.track = ? "
+                "JOIN papers AS b ON b.id = paper_b AND b.track = ? "
+                "WHERE shared >= 2 AND shared >= ? ORDER BY shared DESC LIMIT ?", (track, track, min_shared, limit))
+
+        clusters = []
+        for paper_a, paper_b, shared in rows.fetchall():
+            papers = [self.connection.execute("SELECT path, title FROM papers WHERE id = ?", (paper_id,)).fetchone()
+                      for paper_id in (paper_a, paper_b)]
+            works = [text for (text,) in self.connection.execute(
+                "SELECT works.text FROM paper_works AS a "
+                "JOIN paper_works AS b ON b.work_id = a.work_id AND b.paper_id = ? "
+                "JOIN works ON works.id = a.work_id "
+                "WHERE a.paper_id = ? AND works.paper_count <= ? LIMIT 5",
+                (paper_b, paper_a, RARE_WORK_MAX_PAPERS))]
+            clusters.append({'papers': (papers[0][0], papers[1][0]), 'titles': (papers[0][1], papers[1][1]),
+                             'shared': shared, 'works': works})
+        return clusters
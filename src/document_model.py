@@ -0,0 +1,227 @@
+import bisect
+import functools
+import re
+from array import array
+from .profiling import stage
+
+# Sentence boundary: whitespace after '.', '?' or a newline, except after
+# abbreviations like "e.g." or "Dr.". Starts with \s so non-space positions are rejected cheaply.
+SENTENCE_BOUNDARY = re.compile(r'\s(?<=[.?\n]\s)(?<!\w\.\w.\s)(?<![A-Z][a-z]\.\s)')
+# Characters of lookbehind context SENTENCE_BOUNDARY needs before a whitespace
+BOUNDARY_CONTEXT = 4
+
+DEFAULT_CITATION_PHRASES = [
+    "studies show", "research indicates", "it is known",
+    "evidence suggests", "experts agree", "it has been demonstrated",
+    "the prevailing view is", "is widely accepted", "has been found to"
+]
+
+# In-text citation markers. Every repeated part stops at a delimiter it cannot contain
+# (a bracket, brace or newline), so matching takes linear time on any input: a failed
+# attempt from one start position never rescans text that a later start covers.
+CITATION_PATTERN = re.compile(
+    r'\\(?=[A-Za-z]*cite)[A-Za-z]+\*?(?:\[[^\[\]]*\])*\{[^{}\n]*\}'
+    r'|\[\d+\]'
+    r'|\([\w\s.,;]+,\s*\d{4}\)'
+    r'|\[[\w\s.,;]+,\s*\d{4}\]'
+)
+
+def trie_pattern(phrases):
+    """
+    Builds a regex alternation from a prefix trie of phrases, so matching
+    cost depends on the length of the phrases rather than how many there are.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + pattern + ')?' if '' in node else pattern
+
+    return build(trie)
+
+@functools.lru_cache(maxsize=8)
+def compile_phrase_pattern(phrases, ignore_case=False):
+    """Compiles a trigger-phrase list into a single trie-shaped regex."""
+    return re.compile(trie_pattern(phrases), re.IGNORECASE if ignore_case else 0)
+
+def normalize_phrases(phrases):
+    """Returns phrases (DEFAULT_CITATION_PHRASES if None) lowercased, deduplicated and sorted."""
+    if phrases is None:
+        phrases = DEFAULT_CITATION_PHRASES
+    return tuple(sorted({phrase.strip().lower() for phrase in phrases if phrase.strip()}))
+
+class DocumentModel:
+    """
+    The structure of one paper's text, built once and shared by every check.
+    Positions are character offsets into the full text, held in compact
+    arrays rather than as lists of substrings:
+
+    - chunk_starts / chunk_sources: where each chunk (a PDF page or a LaTeX
+      source slice) starts in the text, and the page number or source-file
+      offset it came from
+    - sentence_starts / sentence_ends: the span of every sentence
+    - citation_starts / citation_ends: every in-text citation marker
+    - trigger_sentences: indices of the sentences containing a trigger
+      phrase; trigger_texts keeps their text, the only substrings retained
+    - section_offsets: where each section heading starts, with its heading
+      text in section_headings and the standard sections it names in
+      section_names
+    - reference_years: publication years of the bibliography entries
+    """
+
+    def __init__(self):
+        self.length = 0
+        self.chunk_starts = array('q')
+        self.chunk_sources = array('q')
+        self.sentence_starts = array('q')
+        self.sentence_ends = array('q')
+        self.citation_starts = array('q')
+        self.citation_ends = array('q')
+        self.trigger_sentences = array('q')
+        self.trigger_texts = []
+        self.section_offsets = array('q')
+        self.section_headings = []
+        self.section_names = []
+        self.reference_years = array('H')
+
+    @classmethod
+    def from_text(cls, text, phrases=None):
+        """Builds a model of text (a string or an iterable of chunks, see scan)."""
+        model = cls()
+        model.scan(text, phrases)
+        return model
+
+    def scan(self, chunks, phrases=None):
+        """
+        Reads the paper's text in a single pass, recording chunks, sentence
+        boundaries, citation markers and the sentences containing one of
+        phrases (DEFAULT_CITATION_PHRASES if None). chunks is a string or an
+        iterable of strings or (source, text) pairs, e.g. (page number, page
+        text); only the unfinished sentence is held between chunks, so memory
+        is bounded by the chunk size. Call once per model.
+        """
+        phrases = normalize_phrases(phrases)
+        chunks = [chunks] if isinstance(chunks, str) else chunks
+        buffer = ""
+        base = 0  # offset of buffer[0] in the full text
+        offset = 0  # start of the unfinished sentence in buffer
+        scanned = 0  # boundaries have already been searched up to here
+        marker_start = 0  # citation markers have already been recorded up to here
+
+        def scan_buffer(final):
+            """Records the complete sentences in buffer and returns where the unfinished one starts."""
+            starts = [offset]
+            with stage('text.sentence_split', len(buffer) - scanned):
+                for match in SENTENCE_BOUNDARY.finditer(buffer, scanned):
+                    starts.append(match.end())
+            if final:
+                starts.append(len(buffer) + 1)
+            first_index = len(self.sentence_starts)
+            # Each boundary is a single whitespace character
+            for start, next_start in zip(starts, starts[1:]):
+                self.sentence_starts.append(base + start)
+                self.sentence_ends.append(base + next_start - 1)
+            if len(starts) < 2 or not phrases:
+                return starts[-1]
+
+            triggered = set()
+            with stage('text.phrase_scan', starts[-1] - 1 - offset):
+                lowered = buffer.lower()
+                if len(lowered) == len(buffer):
+                    hits = compile_phrase_pattern(phrases).finditer(lowered, offset, starts[-1] - 1)
+                else:
+                    hits = compile_phrase_pattern(phrases, ignore_case=True).finditer(buffer, offset, starts[-1] - 1)
+                for hit in hits:
+                    triggered.add(bisect.bisect_right(starts, hit.start()) - 1)
+            for index in sorted(triggered):
+                self.trigger_sentences.append(first_index + index)
+                self.trigger_texts.append(buffer[starts[index]:starts[index + 1] - 1])
+            return starts[-1]
+
+        def scan_citations(limit):
+            """
+            Records the citation markers starting before limit (a sentence
+            start in buffer), reading on into the rest of buffer so markers
+            spanning a page break are matched whole.
+            """
+            nonlocal marker_start
+            position = marker_start - base
+            with stage('text.citation_regex', max(0, limit - position)):
+                for match in CITATION_PATTERN.finditer(buffer, position):
+                    if match.start() >= limit:
+                        break
+                    self.citation_starts.append(base + match.start())
+                    self.citation_ends.append(base + match.end())
+                    position = match.end()
+            marker_start = base + max(position, limit)
+
+        for chunk in chunks:
+            source, chunk = chunk if isinstance(chunk, tuple) else (self.length, chunk)
+            self.chunk_starts.append(self.length)
+            self.chunk_sources.append(source)
+            self.length += len(chunk)
+
+            buffer += chunk
+            pending_start = scan_buffer(final=False)
+            scan_citations(pending_start)
+            keep_from = max(0, pending_start - BOUNDARY_CONTEXT)
+            scanned = len(buffer) - keep_from
+            buffer = buffer[keep_from:]
+            base += keep_from
+            offset = pending_start - keep_from
+        scan_buffer(final=True)
+        scan_citations(len(buffer) + 1)
+
+    def add_section(self, offset, heading, names):
+        """Records a section heading at offset; names are the standard sections it stands for."""
+        index = bisect.bisect_right(self.section_offsets, offset)
+        self.section_offsets.insert(index, offset)
+        self.section_headings.insert(index, heading)
+        self.section_names.insert(index, tuple(names))
+
+    def found_sections(self):
+        """Returns the set of standard section names with a heading in the model."""
+        return {name for names in self.section_names for name in names}
+
+    def section_at(self, offset):
+        """Returns the heading of the section containing offset, or None before the first heading."""
+        index = bisect.bisect_right(self.section_offsets, offset) - 1
+        return self.section_headings[index] if index >= 0 else None
+
+    def _chunk_index(self, offset):
+        return max(0, bisect.bisect_right(self.chunk_starts, offset) - 1)
+
+    def chunk_source(self, offset):
+        """Returns the source of the chunk containing offset, e.g. the PDF page number."""
+        return self.chunk_sources[self._chunk_index(offset)] if self.chunk_starts else None
+
+    def source_offset(self, offset):
+        """Maps a text offset to an offset in the chunk's source (for LaTeX, the .tex file)."""
+        index = self._chunk_index(offset)
+        return self.chunk_sources[index] + offset - self.chunk_starts[index]
+
+    def text_offset(self, source_offset):
+        """Maps an offset in the source back to the text; the inverse of source_offset."""
+        index = max(0, bisect.bisect_right(self.chunk_sources, source_offset) - 1)
+        return self.chunk_starts[index] + source_offset - self.chunk_sources[index]
+
+    def has_citation(self, start, end):
+        """True if a citation marker lies entirely within [start, end)."""
+        index = bisect.bisect_left(self.citation_starts, start)
+        # Markers do not overlap, so the first one starting in range ends first
+        return (index < len(self.citation_starts) and self.citation_starts[index] < end
+                and self.citation_ends[index] <= end)
+
+    def citation_count(self):
+        return len(self.citation_starts)
+
+    def sentence_count(self):
+        return len(self.sentence_starts)
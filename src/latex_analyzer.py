@@ -1,108 +1,306 @@
 import re
 import os
-from datetime import datetime
-from .shared_utils import check_for_missing_citations, check_structure
+from . import budget
+from .bibtex_index import BibTeXIndex
+from .document_model import DocumentModel
+from .latex_scanner import scan_latex, strip_comments
+from .profiling import stage
+from .shared_utils import REFERENCE_YEAR, check_structure, find_missing_citations, reference_age_analysis, reference_entry
 
-def _get_full_tex_content(file_path, base_dir, visited_files=None):
+# Control words and ties, replaced by spaces in bibliography entries to leave their plain text
+_MARKUP = re.compile(r'\\[A-Za-z]+\*?|~')
+
+def _reference_year(bibitem_body):
+    """Returns the first plausible publication year in a bibliography entry (without comments), or None."""
+    year_match = REFERENCE_YEAR.search(bibitem_body)
+    return int(year_match.group(0)) if year_match else None
+
+def _plain_text(markup):
+    """Reduces a bibliography entry or BibTeX title to plain text."""
+    return _MARKUP.sub(' ', markup).replace('{', '').replace('}', '')
+
+def parse_tex_source(content, phrases=None, file_path=None):
     """
-    Recursively reads content from a LaTeX file and its included files.
-    Avoids infinite loops by tracking visited files.
+    Tokenizes the source of a single LaTeX file once and collects everything
+    the checks need from it: metadata, citation keys, bibliography keys and
+    entries (as report_data 'references' entries), included files, and a DocumentModel of its text holding the sections and
+    bibliography years. Missing-citation findings carry file_path and the
+    line and section they were found in.
+    """
+    parsed = {
+        'title': None,
+        'author': None,
+        'has_abstract': False,
+        'citations': set(),
+        'cites_all': False,
+        'bibitems': [],  # keys in source order
+        'references': [],
+        'includes': [],
+        'bibliographies': [],
+    }
+    model = DocumentModel()
+    sections = []  # (source offset, heading)
+    open_bibitem = None  # (key, body start) of the entry being read
+
+    def close_bibitem(end):
+        nonlocal open_bibitem
+        if open_bibitem is not None:
+            key, body_start = open_bibitem
+            parsed['bibitems'].append(key)
+            body = strip_comments(content[body_start:end])
+            year = _reference_year(body)
+            if year is not None:
+                model.reference_years.append(year)
+            parsed['references'].append(reference_entry(_plain_text(body), key, year))
+            open_bibitem = None
+
+    def text_segments():
+        nonlocal open_bibitem
+        limit = budget.limit('latex.parse')
+        for event in scan_latex(content):
+            if event.kind == 'text':
+                if limit.expired(f"{event.start} of {len(content)} characters"):
+                    break
+                yield event.start, event.value
+            elif event.kind in ('title', 'author'):
+                if parsed[event.kind] is None:
+                    parsed[event.kind] = event.value
+            elif event.kind == 'section':
+                sections.append((event.start, event.value))
+            elif event.kind == 'cite':
+                if '*' in event.value:
+                    parsed['cites_all'] = True
+                parsed['citations'].update(key for key in event.value if key != '*')
+            elif event.kind == 'bibitem':
+                close_bibitem(event.start)
+                open_bibitem = (event.value, event.end)
+            elif event.kind == 'par' or (event.kind == 'end' and event.value == 'thebibliography'):
+                close_bibitem(event.start)
+            elif event.kind == 'begin' and event.value == 'abstract':
+                parsed['has_abstract'] = True
+            elif event.kind == 'input':
+                parsed['includes'].append(event.value)
+            elif event.kind == 'bibliography':
+                parsed['bibliographies'].extend(event.value)
+        close_bibitem(len(content))
+
+    with stage('latex.parse', len(content)):
+        model.scan(text_segments(), phrases)
+        for source_offset, heading in sections:
+            model.add_section(model.text_offset(source_offset), heading, (heading.lower(),))
+
+    missing_citations = []
+    line, counted = 1, 0
+    for sentence, start, _ in find_missing_citations(model):
+        source_offset = model.source_offset(start)
+        line += content.count('\n', counted, source_offset)
+        counted = source_offset
+        missing_citations.append({'sentence': sentence, 'file': file_path, 'line': line,
+                                  'section': model.section_at(start)})
+    parsed['model'] = model
+    parsed['missing_citations'] = missing_citations
+    return parsed
+
+def read_and_parse_tex_file(abs_file_path, phrases=None):
+    """Reads and parses one LaTeX file, returning None if it cannot be read."""
+    try:
+        with stage('latex.read') as frame:
+            with open(abs_file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            frame.input_size = len(content)
+    except FileNotFoundError:
+        print(f"Error: LaTeX file not found: {abs_file_path}")
+        return None
+    except Exception as e:
+        print(f"Error reading LaTeX file {abs_file_path}: {e}")
+        return None
+    return parse_tex_source(content, phrases, abs_file_path)
+
+def _resolve_include(current_dir, included_file):
+    """Resolves an \\input/\\include argument relative to the including file's directory."""
+    # Handle cases where .tex extension is omitted
+    if not included_file.endswith('.tex'):
+        included_file += '.tex'
+    return os.path.join(current_dir, included_file)
+
+def _parse_tex_tree(file_path, parse_file, visited_files=None, warn=True):
+    """
+    Parses a LaTeX file and, after it, every file it includes (recursively),
+    yielding (abs_path, parse result) per file. parse_file(abs_path) does the
+    actual parsing so callers can serve unchanged files from a cache.
+    Includes are read in order, depth first, relative to the including file;
+    commented-out includes are ignored. warn=False skips the warning for
+    missing includes.
     """
     if visited_files is None:
         visited_files = set()
 
-    # Resolve the absolute path to handle relative includes correctly
     abs_file_path = os.path.abspath(file_path)
-
     if abs_file_path in visited_files:
-        return ""
+        return
     visited_files.add(abs_file_path)
 
-    full_content = ""
+    parsed = parse_file(abs_file_path)
+    if parsed is None:
+        return
+    yield abs_file_path, parsed
+
+    current_dir = os.path.dirname(abs_file_path)
+    for included_file in parsed['includes']:
+        included_path = _resolve_include(current_dir, included_file)
+        if os.path.exists(included_path):
+            yield from _parse_tex_tree(included_path, parse_file, visited_files, warn)
+        elif warn:
+            print(f"Warning: Included file not found: {included_path}")
+
+def _scan_tex_dependencies(abs_file_path):
+    """Reads one LaTeX file and collects only its includes and bibliographies, or returns None if it cannot be read."""
     try:
         with open(abs_file_path, 'r', encoding='utf-8') as f:
             content = f.read()
-        full_content += content
-
-        # Find included files (e.g., \input{file}, \include{file})
-        # This regex is simplified and might need refinement for more complex cases
-        included_files = re.findall(r'\\(?:input|include)\{(.*?)\}', content)
-        
-        current_dir = os.path.dirname(abs_file_path)
-
-        for included_file in included_files:
-            # Handle cases where .tex extension is omitted
-            if not included_file.endswith('.tex'):
-                included_file += '.tex'
-            
-            # Construct the path relative to the current file's directory
-            included_path = os.path.join(current_dir, included_file)
-            
-            if os.path.exists(included_path):
-                full_content += _get_full_tex_content(included_path, current_dir, visited_files)
-            else:
-                print(f"Warning: Included file not found: {included_path}")
+    except (OSError, UnicodeDecodeError):
+        return None
+    scanned = {'content': content, 'includes': [], 'bibliographies': []}
+    for event in scan_latex(content):
+        if event.kind == 'input':
+            scanned['includes'].append(event.value)
+        elif event.kind == 'bibliography':
+            scanned['bibliographies'].extend(event.value)
+    return scanned
 
-    except FileNotFoundError:
-        print(f"Error: LaTeX file not found: {abs_file_path}")
-    except Exception as e:
-        print(f"Error reading LaTeX file {abs_file_path}: {e}")
+def tex_dependencies(tex_path):
+    """
+    Returns (sources, bib_paths) for a LaTeX project without parsing it:
+    the (abs path, content) of the main file and every file it includes, in
+    the order analyze_tex_file reads them, and the .bib files they name (see
+    bibliography_candidates). Commented-out includes and bibliographies are
+    ignored, as in the analysis; missing files are skipped silently.
+    """
+    scanned_files = list(_parse_tex_tree(tex_path, _scan_tex_dependencies, warn=False))
+    sources = [(abs_path, scanned['content']) for abs_path, scanned in scanned_files]
+    bib_paths = bibliography_candidates([scanned for _, scanned in scanned_files],
+                                        os.path.dirname(os.path.abspath(tex_path)))
+    return sources, bib_paths
 
-    return full_content
+def bibliography_candidates(parsed_files, base_dir):
+    """Returns the .bib paths named by \\bibliography/\\addbibresource relative to base_dir, existing or not."""
+    bib_paths = []
+    for parsed in parsed_files:
+        for name in parsed['bibliographies']:
+            if not name.endswith('.bib'):
+                name += '.bib'
+            bib_path = os.path.join(base_dir, name)
+            if bib_path not in bib_paths:
+                bib_paths.append(bib_path)
+    return bib_paths
 
-def analyze_tex_file(tex_path):
+def resolve_bibliography_paths(parsed_files, base_dir):
+    """Resolves \\bibliography/\\addbibresource names to existing .bib files relative to base_dir."""
+    bib_paths = []
+    for bib_path in bibliography_candidates(parsed_files, base_dir):
+        if not os.path.exists(bib_path):
+            print(f"Warning: Bibliography file not found: {bib_path}")
+        else:
+            bib_paths.append(bib_path)
+    return bib_paths
+
+def _lookup_bibtex_entries(bib_paths, keys):
     """
-    Analyzes a LaTeX file (and its included files) and returns a dictionary of findings.
+    Looks up citation keys in the persistent indexes of the given .bib files.
+    Earlier databases take precedence, as with BibTeX itself.
     """
-    report_data = {}
-    
-    # Get the full content by recursively reading included files
-    full_content = _get_full_tex_content(tex_path, os.path.dirname(tex_path))
+    entries = {}
+    remaining = set(keys)
+    limit = budget.limit('latex.bibtex_lookup')
+    for searched, bib_path in enumerate(bib_paths):
+        if not remaining or limit.expired(f"{searched} of {len(bib_paths)} databases"):
+            break
+        found = BibTeXIndex(bib_path).lookup(remaining)
+        entries.update(found)
+        remaining -= found.keys()
+    return entries
 
-    title = re.search(r'\\title\{(.*?)\}', full_content)
-    author = re.search(r'\\author\{(.*?)\}', full_content)
-    abstract = re.search(r'\\begin\{abstract\}(.*?)\\end\{abstract\}', full_content, re.DOTALL)
-    sections = re.findall(r'\\section\{(.*?)\}', full_content)
+def build_tex_report(parsed_files, base_dir=None):
+    """
+    Merges the per-file parse results of a LaTeX project into report_data.
+    base_dir is the main file's directory; when given, citations are also
+    resolved against the .bib databases named by \\bibliography.
+    """
+    report_data = {}
 
+    title = next((parsed['title'] for parsed in parsed_files if parsed['title'] is not None), None)
+    author = next((parsed['author'] for parsed in parsed_files if parsed['author'] is not None), None)
     report_data['metadata'] = {
-        'title': title.group(1) if title else "Not Found",
-        'author': author.group(1) if author else "Not Found"
+        'title': title if title is not None else "Not Found",
+        'author': author if author is not None else "Not Found"
     }
-    
-    found_sections_and_abstract = sections
-    if abstract:
+
+    found_sections_and_abstract = [heading for parsed in parsed_files for heading in parsed['model'].section_headings]
+    if any(parsed['has_abstract'] for parsed in parsed_files):
         found_sections_and_abstract.append("abstract")
-        
+
     report_data['found_sections'] = found_sections_and_abstract
     report_data['missing_sections'] = check_structure(found_sections_and_abstract)
 
-    in_text_citations = set(re.findall(r'\\cite\{(.*?)\}', full_content))
-    bib_items = set(re.findall(r'\\bibitem\{(.*?)\}', full_content))
+    in_text_citations = set().union(*(parsed['citations'] for parsed in parsed_files))
+    bib_items = {key for parsed in parsed_files for key in parsed['bibitems']}
+    cites_all = any(parsed['cites_all'] for parsed in parsed_files)
 
-    report_data['unresolved_citations'] = list(in_text_citations - bib_items)
-    report_data['unused_references'] = list(bib_items - in_text_citations)
+    # Only cited keys are looked up, so this costs O(citations) rather than O(database size)
+    bib_paths = resolve_bibliography_paths(parsed_files, base_dir) if base_dir is not None else []
+    with stage('latex.bibtex_lookup', len(in_text_citations)):
+        bibtex_entries = _lookup_bibtex_entries(bib_paths, in_text_citations - bib_items) if bib_paths else {}
 
-    report_data['missing_citation_sentences'] = check_for_missing_citations(full_content)
+    report_data['unresolved_citations'] = sorted(in_text_citations - bib_items - bibtex_entries.keys())
+    # BibTeX only typesets cited entries, so unused references are reported for \bibitem lists only
+    report_data['unused_references'] = [] if cites_all else sorted(bib_items - in_text_citations)
+
+    missing_citations = []
+    for parsed in parsed_files:
+        for finding in parsed['missing_citations']:
+            if base_dir is not None and finding['file'] is not None:
+                finding = dict(finding, file=os.path.relpath(finding['file'], base_dir))
+            missing_citations.append(finding)
+    report_data['missing_citation_sentences'] = [finding['sentence'] for finding in missing_citations]
+    report_data['missing_citations'] = missing_citations
 
     # --- Reference Age Analysis ---
-    current_year = datetime.now().year
-    reference_years = []
-    for item in re.finditer(r'\\bibitem\{.*?\}(.*?)(?:\\par|$)', full_content, re.DOTALL):
-        bibitem_content = item.group(1)
-        year_match = re.search(r'(?:19|20)\d{2}', bibitem_content)
-        if year_match:
-            year = int(year_match.group(0))
-            reference_years.append(year)
-
-    if reference_years:
-        average_age = current_year - (sum(reference_years) / len(reference_years))
-        old_references = [year for year in reference_years if (current_year - year) > 10]
-        report_data['average_reference_age'] = f"{average_age:.1f} years"
-        report_data['old_references_count'] = len(old_references)
-        report_data['old_references_percentage'] = f"{len(old_references) / len(reference_years) * 100:.1f}%"
+    reference_years = [year for parsed in parsed_files for year in parsed['model'].reference_years]
+    if cites_all:
+        with stage('latex.bibtex_all_years'):
+            limit = budget.limit('latex.bibtex_all_years')
+            for searched, bib_path in enumerate(bib_paths):
+                if limit.expired(f"{searched} of {len(bib_paths)} databases"):
+                    break
+                all_entries = BibTeXIndex(bib_path).all_entries()
+                reference_years.extend(entry['year'] for entry in all_entries.values() if entry['year'] is not None)
+                # As with lookups, earlier databases take precedence
+                bibtex_entries = dict(all_entries, **bibtex_entries)
     else:
-        report_data['average_reference_age'] = "N/A"
-        report_data['old_references_count'] = 0
-        report_data['old_references_percentage'] = "0.0%"
+        reference_years.extend(entry['year'] for entry in bibtex_entries.values() if entry['year'] is not None)
+
+    references = [reference for parsed in parsed_files for reference in parsed['references']]
+    for key in sorted(bibtex_entries):
+        entry = bibtex_entries[key]
+        references.append(reference_entry(_plain_text(entry['title'] or ""), key, entry['year'], entry['doi']))
+    report_data['references'] = references
+
+    report_data.update(reference_age_analysis(reference_years))
 
     return report_data
+
+def analyze_tex_file(tex_path, phrases=None):
+    """
+    Analyzes a LaTeX file (and its included files) and returns a dictionary of findings.
+    Each file is tokenized once by the LaTeX scanner and every check works from its events.
+    phrases overrides the trigger phrases of the missing-citation check.
+    """
+    parse_file = lambda abs_file_path: read_and_parse_tex_file(abs_file_path, phrases)
+    parsed_files = []
+    limit = budget.limit('latex.files')
+    for _, parsed in _parse_tex_tree(tex_path, parse_file):
+        parsed_files.append(parsed)
+        # Checked before the next included file is read
+        if limit.expired(f"{len(parsed_files)} file(s)"):
+            break
+    return build_tex_report(parsed_files, os.path.dirname(os.path.abspath(tex_path)))
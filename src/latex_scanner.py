@@ -0,0 +1,120 @@
+import re
+from collections import namedtuple
+
+LatexEvent = namedtuple('LatexEvent', ['kind', 'value', 'start', 'end'])
+
+# A comment, an escaped character (e.g. \%) or a control word such as \section*
+_TOKEN = re.compile(r'%[^\n]*|\\(?:([A-Za-z]+)\*?|.)', re.DOTALL)
+_GROUP_TOKEN = re.compile(r'\\.|%[^\n]*|[{}]', re.DOTALL)
+_CITE_COMMAND = re.compile(r'[A-Za-z]*cite[A-Za-z]*')
+
+# Commands whose braced argument is reported, mapped to the event kind they produce
+_ARGUMENT_COMMANDS = {
+    'title': 'title',
+    'author': 'author',
+    'chapter': 'section',
+    'section': 'section',
+    'bibitem': 'bibitem',
+    'begin': 'begin',
+    'end': 'end',
+    'input': 'input',
+    'include': 'input',
+    'bibliography': 'bibliography',
+    'addbibresource': 'bibliography',
+}
+
+def _read_group(source, pos):
+    """
+    Reads a balanced {...} group starting at source[pos] == '{'.
+    Returns (content, end) with comments removed, or (None, pos) if unbalanced.
+    """
+    depth = 0
+    pieces = []
+    last = pos + 1
+    for match in _GROUP_TOKEN.finditer(source, pos):
+        token = match.group(0)
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth -= 1
+            if depth == 0:
+                pieces.append(source[last:match.start()])
+                return "".join(pieces), match.end()
+        elif token.startswith('%'):
+            pieces.append(source[last:match.start()])
+            last = match.end()
+    return None, pos
+
+def _read_arguments(source, pos):
+    """
+    Skips up to two optional [...] arguments and reads the mandatory {...}
+    argument that follows. Returns (argument, end) or (None, pos).
+    """
+    length = len(source)
+    for _ in range(3):
+        while pos < length and source[pos] in ' \t\n':
+            pos += 1
+        if pos < length and source[pos] == '[':
+            close = source.find(']', pos)
+            if close == -1:
+                return None, pos
+            pos = close + 1
+        else:
+            break
+    if pos < length and source[pos] == '{':
+        return _read_group(source, pos)
+    return None, pos
+
+def scan_latex(source):
+    """
+    Tokenizes LaTeX source in a single pass, skipping % comments, and yields
+    LatexEvent tuples in source order:
+
+    - 'text': a comment-free slice of the source (the slices together form the
+      document text with comments removed)
+    - 'title', 'author', 'section': the braced argument of \\title, \\author,
+      \\chapter or \\section (starred and [short] forms included)
+    - 'cite': a list of keys from any citation command (\\cite, \\citep,
+      \\citet, \\parencite, \\nocite, ...), including multi-key \\cite{a,b}
+    - 'bibitem': the key of a \\bibitem[label]{key}
+    - 'begin', 'end': environment names
+    - 'par': a \\par command
+    - 'input': a file named by \\input or \\include
+    - 'bibliography': a list of database names from \\bibliography or \\addbibresource
+    """
+    text_start = 0
+    for match in _TOKEN.finditer(source):
+        if match.group(0).startswith('%'):
+            if match.start() > text_start:
+                yield LatexEvent('text', source[text_start:match.start()], text_start, match.start())
+            text_start = match.end()
+            continue
+
+        command = match.group(1)
+        if command is None:
+            continue
+        if command == 'par':
+            yield LatexEvent('par', None, match.start(), match.end())
+            continue
+
+        kind = _ARGUMENT_COMMANDS.get(command)
+        if kind is None and _CITE_COMMAND.fullmatch(command):
+            kind = 'cite'
+        if kind is None:
+            continue
+
+        argument, end = _read_arguments(source, match.end())
+        if argument is None:
+            continue
+        if kind in ('cite', 'bibliography'):
+            value = [key.strip() for key in argument.split(',') if key.strip()]
+        else:
+            value = argument.strip()
+        yield LatexEvent(kind, value, match.start(), end)
+
+    if len(source) > text_start:
+        yield LatexEvent('text', source[text_start:], text_start, len(source))
+
+def strip_comments(source):
+    """Returns source with all % comments removed."""
+    return "".join(event.value for event in scan_latex(source) if event.kind == 'text')
@@ -1,70 +1,439 @@
 import fitz  # PyMuPDF
 import re
-from datetime import datetime
-from .shared_utils import check_for_missing_citations, check_structure
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from . import budget
+from .document_model import DocumentModel
+from .profiling import stage
+from .shared_utils import check_structure, find_missing_citations, reference_age_analysis, reference_entry
+
+STANDARD_SECTIONS = ["abstract", "introduction", "methods", "results", "discussion", "references"]
+# Headings that end the references section when they follow it
+END_OF_REFERENCES_HEADING = re.compile(r'(?:[A-Z\d]+\.?\s+)?(?:Appendix|Appendices|Supplementary (?:Materials?|Information))'
+                                       r'(?:\s+[A-Z\d]+)?[.:]?(?:\s.*)?', re.IGNORECASE)
+
+# Heading text (lowercase, unnumbered) -> the standard sections it stands for
+SECTION_SYNONYMS = {
+    'abstract': ['abstract'],
+    'introduction': ['introduction', 'background', 'introduction and background', 'background and motivation'],
+    'methods': ['methods', 'methodology', 'materials and methods', 'methods and materials',
+                'material and methods', 'experimental methods', 'experimental setup', 'experimental procedures'],
+    'results': ['results', 'findings', 'experimental results', 'results and discussion'],
+    'discussion': ['discussion', 'general discussion', 'conclusion', 'conclusions', 'discussion and conclusion',
+                   'discussion and conclusions', 'conclusions and future work', 'results and discussion'],
+    'references': ['references', 'bibliography', 'literature cited', 'works cited', 'reference list'],
+}
+# Leading section numbers ("2", "3.1", "IV.", "A)") before a heading
+_HEADING_NUMBER = re.compile(r'\s*(?:(?:\d+(?:\.\d+)*|[IVXLC]+|[A-Z])[.):]?\s+)?')
+# A numbered reference marker ("[12]" or "12.") at the start of a line
+_REFERENCE_MARKER = re.compile(r'^[ \t]*(?:\[(\d+)\]|(\d{1,3})\.(?=\s))', re.MULTILINE)
+# Lines longer than this are never headings
+_MAX_HEADING_LENGTH = 80
+# Sources of a section heading, most reliable first
+_HEADING_SOURCES = ('outline', 'layout', 'text')
+
+def normalize_heading(line):
+    """
+    Strips numbering, a trailing colon, case and repeated whitespace from a
+    heading line. A trailing period is kept, so a wrapped sentence ending in
+    e.g. "results." on a line of its own is not a heading.
+    """
+    # The trailing colon is trimmed by hand: a lazy regex for it takes quadratic time on long titles
+    words = line[_HEADING_NUMBER.match(line).end():].lower().split()
+    while words:
+        words[-1] = words[-1].rstrip(':')
+        if words[-1]:
+            break
+        words.pop()
+    return " ".join(words)
+
+def build_heading_table(synonyms=None):
+    """Inverts a synonym table ({section: [heading, ...]}) into {heading: (section, ...)}."""
+    table = {}
+    for section, headings in (synonyms or SECTION_SYNONYMS).items():
+        for heading in headings:
+            key = normalize_heading(heading)
+            table[key] = table.get(key, ()) + (section,)
+    return table
+
+_DEFAULT_HEADING_TABLE = build_heading_table()
+
+def heading_table_for(section_synonyms=None):
+    """
+    Returns the heading table for SECTION_SYNONYMS extended by
+    section_synonyms ({section: [heading, ...]}, e.g. from
+    shared_utils.load_section_synonyms).
+    """
+    if not section_synonyms:
+        return _DEFAULT_HEADING_TABLE
+    synonyms = {section: list(headings) for section, headings in SECTION_SYNONYMS.items()}
+    for section, headings in section_synonyms.items():
+        synonyms.setdefault(section, []).extend(headings)
+    return build_heading_table(synonyms)
+
+def _styled_heading_lines(page, textpage):
+    """
+    Returns the normalized text of the lines on a page that are set larger
+    than the page's body text or entirely in bold, from span font metadata.
+    """
+    lines = []
+    body_sizes = Counter()
+    for block in page.get_text("dict", textpage=textpage)["blocks"]:
+        for line in block.get("lines", ()):
+            spans = [span for span in line["spans"] if span["text"].strip()]
+            if not spans:
+                continue
+            text = "".join(span["text"] for span in spans).strip()
+            for span in spans:
+                body_sizes[round(span["size"], 1)] += len(span["text"])
+            bold = all(span["flags"] & 16 or "bold" in span["font"].lower() for span in spans)
+            lines.append((text, max(span["size"] for span in spans), bold))
+    if not lines:
+        return set()
+    body_size = body_sizes.most_common(1)[0][0]
+    return {normalize_heading(text) for text, size, bold in lines
+            if len(text) <= _MAX_HEADING_LENGTH and (size >= body_size * 1.15 or bold)}
+
+def iter_pdf_pages(pdf_path, start_page=0, end_page=None, layout=False, heading_table=None):
+    """
+    Lazily yields (page_number, text, styled_headings) for the pages in
+    [start_page, end_page). Page numbers are 1-based; only one page of text
+    is held at a time. With layout, styled_headings is the set of normalized
+    lines set in a heading font (see _styled_heading_lines), read from the
+    same parsed text page; it is only computed for pages with a line matching
+    the heading table and is None otherwise.
+    """
+    with fitz.open(pdf_path) as doc:
+        end_page = doc.page_count if end_page is None else min(end_page, doc.page_count)
+        for page_index in range(start_page, end_page):
+            with stage('pdf.extract_text') as frame:
+                page = doc[page_index]
+                textpage = page.get_textpage()
+                page_text = page.get_text(textpage=textpage)
+                frame.input_size = len(page_text)
+            styled_headings = None
+            if layout and next(find_section_headings(page_text, heading_table=heading_table), None) is not None:
+                with stage('pdf.extract_layout'):
+                    styled_headings = _styled_heading_lines(page, textpage)
+            yield page_index + 1, page_text, styled_headings
+
+def _extract_page_range(pdf_path, start_page, end_page, layout=False, heading_table=None):
+    """Extracts one shard of pages in a worker process with its own fitz document."""
+    return list(iter_pdf_pages(pdf_path, start_page, end_page, layout, heading_table))
+
+def iter_pdf_pages_sharded(pdf_path, workers, shard_size=16, layout=False, heading_table=None):
+    """
+    Like iter_pdf_pages, but extracts shards of shard_size pages in parallel
+    worker processes. Pages are still yielded in order and at most two shards
+    per worker are in flight, so memory stays bounded by that page window.
+    """
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+    shards = deque((start, min(start + shard_size, page_count)) for start in range(0, page_count, shard_size))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            while shards or pending:
+                while shards and len(pending) < workers * 2:
+                    start, end = shards.popleft()
+                    pending.append(executor.submit(_extract_page_range, pdf_path, start, end, layout, heading_table))
+                with stage('pdf.extract_text_wait'):
+                    shard = pending.popleft().result()
+                yield from shard
+        finally:
+            # If the consumer stops early (e.g. out of time), do not start the queued shards
+            for future in pending:
+                future.cancel()
 
 def extract_text_and_metadata_pdf(pdf_path):
     """Extracts text and metadata from a PDF file."""
-    doc = fitz.open(pdf_path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    metadata = doc.metadata
+    with fitz.open(pdf_path) as doc:
+        text = "".join(page.get_text() for page in doc)
+        metadata = doc.metadata
     return text, metadata
 
-def find_sections_pdf(text):
-    """Identifies key sections in the academic paper from PDF text."""
-    sections = {
-        "abstract": None,
-        "introduction": None,
-        "methods": None,
-        "results": None,
-        "discussion": None,
-        "references": None
-    }
-    for section in sections.keys():
-        match = re.search(r"\n" + section + r"\n", text, re.IGNORECASE)
-        if match:
-            sections[section] = match.start()
-    return sections
-
-def analyze_pdf_file(pdf_path):
-    """Analyzes a PDF file and returns a dictionary of findings."""
+def _text_blocks(page):
+    """Returns the text of the page's text blocks (images are skipped) in reading order."""
+    return [block[4] for block in page.get_text("blocks") if block[6] == 0]
+
+def _is_references_heading(line, heading_table=None):
+    return 'references' in (heading_table or _DEFAULT_HEADING_TABLE).get(normalize_heading(line), ())
+
+def _heading_line(blocks, is_heading, last=True):
+    """
+    Returns (block index, line index) of the last (or first) line of the
+    blocks that satisfies is_heading, or None. Every line is checked, since
+    PyMuPDF often merges a heading into the block of the paragraph above it.
+    """
+    block_indices = range(len(blocks) - 1, -1, -1) if last else range(len(blocks))
+    for index in block_indices:
+        lines = blocks[index].split("\n")
+        line_indices = range(len(lines) - 1, -1, -1) if last else range(len(lines))
+        for line_index in line_indices:
+            line = lines[line_index].strip()
+            if line and len(line) <= _MAX_HEADING_LENGTH and is_heading(line):
+                return index, line_index
+    return None
+
+def find_references_page(doc, heading_table=None):
+    """
+    Returns (page_index, blocks_by_page) for the page holding the bibliography
+    heading, or (None, blocks_by_page). The PDF outline is used when it has a
+    references entry; otherwise pages are scanned backwards from the end, so
+    only the tail of the document is read. blocks_by_page holds the text
+    blocks of every page read while searching, for reuse by the caller.
+    """
+    def is_heading(line):
+        return _is_references_heading(line, heading_table)
+
+    blocks_by_page = {}
+    for _, title, page_number in reversed(doc.get_toc(simple=True)):
+        if 1 <= page_number <= doc.page_count and is_heading(title):
+            return page_number - 1, blocks_by_page
+    limit = budget.limit('pdf.find_references')
+    for page_index in range(doc.page_count - 1, -1, -1):
+        if limit.expired(f"{len(blocks_by_page)} of {doc.page_count} pages"):
+            break
+        blocks_by_page[page_index] = _text_blocks(doc[page_index])
+        if _heading_line(blocks_by_page[page_index], is_heading) is not None:
+            return page_index, blocks_by_page
+    return None, blocks_by_page
+
+def extract_references_blocks(pdf_path, start_page=None, heading_table=None):
+    """
+    Extracts the text blocks of the references section, from the
+    bibliography heading up to an appendix heading or the end of the
+    document, without extracting the pages before it. start_page (0-based)
+    skips the search when the page of the heading is already known, e.g.
+    from a section map. Returns None if no bibliography heading is found.
+    """
+    with fitz.open(pdf_path) as doc:
+        blocks_by_page = {}
+        if start_page is None:
+            with stage('pdf.find_references'):
+                start_page, blocks_by_page = find_references_page(doc, heading_table)
+        if start_page is None:
+            return None
+
+        with stage('pdf.extract_references') as frame:
+            parts = []
+            limit = budget.limit('pdf.extract_references')
+            for page_index in range(start_page, doc.page_count):
+                if limit.expired(f"{page_index - start_page} of {doc.page_count - start_page} pages"):
+                    break
+                blocks = blocks_by_page.get(page_index)
+                if blocks is None:
+                    blocks = _text_blocks(doc[page_index])
+                if page_index == start_page:
+                    heading = _heading_line(blocks, lambda line: _is_references_heading(line, heading_table))
+                    if heading is not None:
+                        # Keep only the lines after the heading, including any entries its block runs on into
+                        index, line_index = heading
+                        rest = "\n".join(blocks[index].split("\n")[line_index + 1:])
+                        blocks = ([rest] if rest.strip() else []) + blocks[index + 1:]
+                end = _heading_line(blocks, END_OF_REFERENCES_HEADING.fullmatch, last=False)
+                if end is not None:
+                    # Keep the entries of the block the appendix heading was merged into
+                    index, line_index = end
+                    head = "\n".join(blocks[index].split("\n")[:line_index])
+                    parts.extend(blocks[:index] + ([head + "\n"] if head.strip() else []))
+                    break
+                parts.extend(blocks)
+            frame.input_size = sum(len(block) for block in parts)
+    return parts
+
+def split_references_pdf(blocks):
+    """
+    Splits the text blocks of a references section into report_data
+    'references' entries: at numbered markers ("[12]", "12.") when the list
+    is numbered, otherwise one entry per text block. Numbered entries are
+    keyed by their number.
+    """
+    # Blocks end at a line break, even where extraction dropped the newline
+    text = "\n".join(blocks)
+    markers = list(_REFERENCE_MARKER.finditer(text))
+    if len(markers) >= 2:
+        ends = [marker.start() for marker in markers[1:]] + [len(text)]
+        parts = [(marker.group(1) or marker.group(2), text[marker.end():end]) for marker, end in zip(markers, ends)]
+    else:
+        parts = [(None, block) for block in blocks]
+    return [reference_entry(part, key) for key, part in parts if part.strip()]
+
+def analyze_pdf_references(pdf_path, start_page=None, heading_table=None):
+    """
+    Reference-only check: returns the reference-age fields and 'references'
+    entries of report_data using only the pages of the references section
+    (see extract_references_blocks). Ages come from the year of each entry.
+    """
+    references_blocks = extract_references_blocks(pdf_path, start_page, heading_table) or []
+    with stage('pdf.reference_ages', sum(len(block) for block in references_blocks)):
+        references = split_references_pdf(references_blocks)
+        report_data = reference_age_analysis([entry['year'] for entry in references if entry['year'] is not None])
+    report_data['references'] = references
+    return report_data
+
+def find_section_headings(text, offset=0, heading_table=None):
+    """
+    Matches every line of text against the heading table (see
+    build_heading_table) in a single pass, ignoring numbering, case and a
+    trailing colon. Yields (sections, heading, position) per heading
+    line; offset is added to positions when text is part of a larger document.
+    """
+    heading_table = heading_table or _DEFAULT_HEADING_TABLE
+    position = offset
+    for line in text.split("\n"):
+        if len(line) <= _MAX_HEADING_LENGTH:
+            sections = heading_table.get(normalize_heading(line))
+            if sections:
+                yield sections, line.strip(), position
+        position += len(line) + 1
+
+def outline_section_headings(outline, heading_table=None):
+    """
+    Maps page number -> {normalized title: title} for the entries of a PDF
+    outline (doc.get_toc(simple=True)) that name a standard section. Also
+    returns whether span font metadata is still needed to find headings,
+    i.e. whether the outline leaves any standard section unnamed.
+    """
+    heading_table = heading_table or _DEFAULT_HEADING_TABLE
+    outline_headings = {}
+    for _, title, page_number in outline:
+        key = normalize_heading(title)
+        if key in heading_table:
+            outline_headings.setdefault(page_number, {})[key] = title.strip()
+    outline_sections = {section for titles in outline_headings.values() for key in titles
+                        for section in heading_table[key]}
+    return outline_headings, not outline_sections.issuperset(STANDARD_SECTIONS)
+
+def page_section_headings(page_text, styled_headings, page_outline, heading_table=None):
+    """
+    Returns the section headings of one page as (source, sections, heading,
+    position in page_text) tuples. page_outline holds the page's entries from
+    outline_section_headings (built with the same heading_table); outline
+    entries whose title is not found in the page text point at the page start.
+    """
+    heading_table = heading_table or _DEFAULT_HEADING_TABLE
+    headings = []
+    with stage('pdf.find_sections', len(page_text)):
+        page_outline = dict(page_outline)
+        for sections, heading, position in find_section_headings(page_text, heading_table=heading_table):
+            key = normalize_heading(heading)
+            if page_outline.pop(key, None) is not None:
+                source = 'outline'
+            elif styled_headings and key in styled_headings:
+                source = 'layout'
+            else:
+                source = 'text'
+            headings.append((source, sections, heading, position))
+        for key, title in page_outline.items():
+            headings.append(('outline', heading_table[key], title, 0))
+    return headings
+
+def build_section_map(headings):
+    """
+    Picks one heading per section from (source, sections, heading, page,
+    offset) tuples in document order: the most reliable source wins, then
+    the first occurrence (the last for references, which follow any table
+    of contents). Returns the section map sorted by offset.
+    """
+    chosen = {}
+    for source, sections, heading, page, offset in headings:
+        rank = _HEADING_SOURCES.index(source)
+        for section in sections:
+            current = chosen.get(section)
+            if current is None or rank < current[0] or (rank == current[0] and section == 'references'):
+                chosen[section] = (rank, {'section': section, 'heading': heading, 'page': page,
+                                          'offset': offset, 'source': source})
+    return sorted((entry for _, entry in chosen.values()), key=lambda entry: entry['offset'])
+
+def analyze_pdf_file(pdf_path, page_workers=None, phrases=None, references_only=False, section_synonyms=None):
+    """
+    Analyzes a PDF file and returns a dictionary of findings.
+    Page text is streamed once into a DocumentModel, which every check then
+    reads, so peak memory is bounded by a page window plus the model's offset
+    arrays rather than the document size. Each flagged sentence is also
+    listed in report_data['missing_citations'] with its page, section and
+    character offset. With page_workers > 1, page
+    ranges are extracted in parallel worker processes. phrases overrides the
+    trigger phrases of the missing-citation check.
+
+    Section headings come from the PDF outline when it names standard
+    sections, otherwise from lines set in a heading font, and finally from
+    any line matching SECTION_SYNONYMS, extended by section_synonyms
+    ({section: [heading, ...]}) for field-specific headings; the same table
+    locates the references section. They are reported in
+    report_data['section_map'] with their page and character offset, and the
+    references entry is reused to read only the references pages for the
+    reference age analysis and the bibliography entries listed in
+    report_data['references'] (see split_references_pdf).
+
+    With references_only, only the metadata and the reference fields are
+    returned, read by analyze_pdf_references without extracting the rest of
+    the document.
+    """
+    heading_table = heading_table_for(section_synonyms)
     report_data = {}
-    text, metadata = extract_text_and_metadata_pdf(pdf_path)
-    report_data['metadata'] = metadata
+    with stage('pdf.metadata'):
+        with fitz.open(pdf_path) as doc:
+            report_data['metadata'] = doc.metadata
+            outline = doc.get_toc(simple=True)
+            page_count = doc.page_count
+    if references_only:
+        report_data.update(analyze_pdf_references(pdf_path, heading_table=heading_table))
+        return report_data
 
-    sections_found = find_sections_pdf(text)
-    found_section_names = [key for key, value in sections_found.items() if value is not None]
+    # Span font metadata is only needed when the outline does not already name every section
+    outline_headings, layout = outline_section_headings(outline, heading_table)
+
+    if page_workers and page_workers > 1:
+        pages = iter_pdf_pages_sharded(pdf_path, page_workers, layout=layout, heading_table=heading_table)
+    else:
+        pages = iter_pdf_pages(pdf_path, layout=layout, heading_table=heading_table)
+
+    model = DocumentModel()
+    headings = []  # (source, sections, heading, page, offset) in document order
+
+    def page_texts():
+        limit = budget.limit('pdf.pages')
+        for page_number, page_text, styled_headings in pages:
+            if limit.expired(f"{page_number - 1} of {page_count} pages"):
+                break
+            page_start = model.length
+            for source, sections, heading, position in page_section_headings(
+                    page_text, styled_headings, outline_headings.get(page_number, {}), heading_table):
+                headings.append((source, sections, heading, page_number, page_start + position))
+            yield page_number, page_text
+
+    model.scan(page_texts(), phrases)
+    pages.close()
+    for _, sections, heading, _, position in headings:
+        model.add_section(position, heading, sections)
+
+    section_map = build_section_map(headings)
+    found = model.found_sections()
+    found_section_names = [section for section in STANDARD_SECTIONS if section in found]
+    report_data['section_map'] = section_map
     report_data['found_sections'] = found_section_names
     report_data['missing_sections'] = check_structure(found_section_names)
+    report_data['citation_count'] = model.citation_count()
 
-    citations = re.findall(r'(\[\d+\]|\([\w\s.,;]+,\s*\d{4}\))|\[[\w\s.,;]+,\s*\d{4}\]', text)
-    report_data['citation_count'] = len(citations)
-
-    report_data['missing_citation_sentences'] = check_for_missing_citations(text)
+    missing_citations = [
+        {'sentence': sentence, 'page': model.chunk_source(start), 'section': model.section_at(start), 'offset': start}
+        for sentence, start, _ in find_missing_citations(model)
+    ]
+    report_data['missing_citation_sentences'] = [finding['sentence'] for finding in missing_citations]
+    report_data['missing_citations'] = missing_citations
 
     # --- Reference Age Analysis for PDF ---
-    current_year = datetime.now().year
-    reference_years = []
-
-    # Attempt to find the references section
-    references_match = re.search(r'(?:References|Bibliography|LITERATURE CITED)\n(.*?)(?:\n\n|$)', text, re.DOTALL | re.IGNORECASE)
-    if references_match:
-        references_text = references_match.group(1)
-        # Find all 4-digit numbers that look like years
-        years_found = re.findall(r'(?:19|20)\d{2}', references_text)
-        reference_years = [int(year) for year in years_found]
-
-    if reference_years:
-        average_age = current_year - (sum(reference_years) / len(reference_years))
-        old_references = [year for year in reference_years if (current_year - year) > 10]
-        report_data['average_reference_age'] = f"{average_age:.1f} years"
-        report_data['old_references_count'] = len(old_references)
-        report_data['old_references_percentage'] = f"{len(old_references) / len(reference_years) * 100:.1f}%"
-    else:
-        report_data['average_reference_age'] = "N/A"
-        report_data['old_references_count'] = 0
-        report_data['old_references_percentage'] = "0.0%"
+    references = next((entry for entry in section_map if entry['section'] == 'references'), None)
+    if references is not None:
+        references_blocks = extract_references_blocks(pdf_path, references['page'] - 1, heading_table)
+        if references_blocks is not None:
+            with stage('pdf.reference_ages', sum(len(block) for block in references_blocks)):
+                report_data['references'] = split_references_pdf(references_blocks)
+                model.reference_years.extend(entry['year'] for entry in report_data['references']
+                                             if entry['year'] is not None)
+    report_data.setdefault('references', [])
+    report_data.update(reference_age_analysis(model.reference_years))
 
     return report_data
@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager
+
+# One finished stage. Times are in seconds; start is a time.perf_counter() value,
+# which is system-wide monotonic and therefore comparable across worker processes.
+# self_wall excludes time spent in nested stages; peak_bytes is the peak Python heap
+# allocated above the level at stage entry (None unless memory tracing is on).
+StageRecord = namedtuple('StageRecord', ['name', 'start', 'wall', 'self_wall', 'cpu', 'input_size',
+                                         'peak_bytes', 'pid', 'tid'])
+
+_enabled = False
+_trace_memory = False
+_records = []
+_listeners = []
+_local = threading.local()
+
+class _Frame:
+    __slots__ = ('name', 'input_size', 'start', 'cpu_start', 'memory_start', 'peak', 'child_wall')
+
+    def __init__(self, name, input_size=None, start=0.0, cpu_start=0.0, memory_start=0):
+        self.name = name
+        self.input_size = input_size
+        self.start = start
+        self.cpu_start = cpu_start
+        self.memory_start = memory_start
+        self.peak = memory_start
+        self.child_wall = 0.0
+
+# Yielded by stage() while profiling is off, so callers can set input_size unconditionally
+_DISABLED_FRAME = _Frame(None)
+
+def enable(trace_memory=True):
+    """
+    Turns stage instrumentation on for this process. With trace_memory, peak
+    allocations are tracked with tracemalloc, which slows execution down.
+    """
+    global _enabled, _trace_memory
+    _enabled = True
+    _trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def disable():
+    """Turns stage instrumentation off; recorded stages are kept until reset()."""
+    global _enabled, _trace_memory
+    _enabled = False
+    if _trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _trace_memory = False
+
+def is_enabled():
+    return _enabled
+
+def add_listener(callback):
+    """Registers callback(record) to be called with every finished StageRecord."""
+    _listeners.append(callback)
+
+def remove_listener(callback):
+    _listeners.remove(callback)
+
+def record_stages(stage_records):
+    """
+    Adds stages recorded in another process (e.g. a batch worker) as if they
+    had been recorded here, notifying listeners.
+    """
+    for record in stage_records:
+        _records.append(record)
+        for listener in _listeners:
+            listener(record)
+
+def records():
+    """Returns the stages recorded in this process so far."""
+    return list(_records)
+
+def reset():
+    """Forgets all recorded stages."""
+    _records.clear()
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+def _fold_peak(stack):
+    """Credits the heap peak since the last reset to every open stage, then resets it."""
+    _, peak = tracemalloc.get_traced_memory()
+    for frame in stack:
+        if peak > frame.peak:
+            frame.peak = peak
+    tracemalloc.reset_peak()
+
+@contextmanager
+def stage(name, input_size=None):
+    """
+    Records wall time, CPU time, input size and peak allocation of the
+    enclosed block under `name`. Does nothing unless profiling is enabled.
+    Yields a frame whose input_size may be set inside the block when the size
+    is only known afterwards. Stages may nest; a stage must not stay open
+    across a generator's yield.
+    """
+    if not _enabled:
+        yield _DISABLED_FRAME
+        return
+
+    stack = _stack()
+    if _trace_memory:
+        _fold_peak(stack)
+        memory_start = tracemalloc.get_traced_memory()[0]
+    else:
+        memory_start = 0
+    frame = _Frame(name, input_size, time.perf_counter(), time.thread_time(), memory_start)
+    stack.append(frame)
+    try:
+        yield frame
+    finally:
+        wall = time.perf_counter() - frame.start
+        cpu = time.thread_time() - frame.cpu_start
+        peak_bytes = None
+        if _trace_memory:
+            _fold_peak(stack)
+            peak_bytes = frame.peak - frame.memory_start
+        stack.pop()
+        if stack:
+            stack[-1].child_wall += wall
+        record = StageRecord(name, frame.start, wall, wall - frame.child_wall, cpu, frame.input_size,
+                             peak_bytes, os.getpid(), threading.get_ident())
+        _records.append(record)
+        for listener in _listeners:
+            listener(record)
+
+@contextmanager
+def collect(trace_memory=True):
+    """
+    Enables profiling for the enclosed block and yields a list that receives
+    every stage recorded meanwhile, e.g. for aggregating over many papers.
+    """
+    collected = []
+    was_enabled = _enabled
+    if not was_enabled:
+        enable(trace_memory)
+    add_listener(collected.append)
+    try:
+        yield collected
+    finally:
+        remove_listener(collected.append)
+        if not was_enabled:
+            disable()
+
+def summarize(stage_records):
+    """
+    Aggregates records by stage name into rows with the call count, total
+    and self wall time, CPU time, total input size and largest peak allocation.
+    """
+    rows = {}
+    for record in stage_records:
+        row = rows.setdefault(record.name, {'stage': record.name, 'calls': 0, 'wall': 0.0, 'self_wall': 0.0,
+                                            'cpu': 0.0, 'input_size': None, 'peak_bytes': None})
+        row['calls'] += 1
+        row['wall'] += record.wall
+        row['self_wall'] += record.self_wall
+        row['cpu'] += record.cpu
+        if record.input_size is not None:
+            row['input_size'] = (row['input_size'] or 0) + record.input_size
+        if record.peak_bytes is not None:
+            row['peak_bytes'] = max(row['peak_bytes'] or 0, record.peak_bytes)
+    return sorted(rows.values(), key=lambda row: row['self_wall'], reverse=True)
+
+def print_stage_table(stage_records):
+    """Prints a per-stage table, slowest (by self time) first."""
+    if not stage_records:
+        print("No profiling data recorded.")
+        return
+    print("\n--- Profile (per stage) ---")
+    print(f"{'stage':<32} {'calls':>6} {'wall ms':>10} {'self ms':>10} {'cpu ms':>10} {'input':>12} {'peak KB':>10}")
+    for row in summarize(stage_records):
+        input_size = f"{row['input_size']:,}" if row['input_size'] is not None else "-"
+        peak = f"{row['peak_bytes'] / 1024:,.0f}" if row['peak_bytes'] is not None else "-"
+        print(f"{row['stage']:<32} {row['calls']:>6} {row['wall'] * 1000:>10.1f} {row['self_wall'] * 1000:>10.1f} "
+              f"{row['cpu'] * 1000:>10.1f} {input_size:>12} {peak:>10}")
+    print("(wall includes nested stages, self excludes them; input is characters or bytes processed)")
+
+def write_chrome_trace(stage_records, output_path):
+    """Writes records as Chrome trace-event JSON (open in chrome://tracing or Perfetto)."""
+    events = []
+    for record in stage_records:
+        args = {'cpu_ms': round(record.cpu * 1000, 3)}
+        if record.input_size is not None:
+            args['input_size'] = record.input_size
+        if record.peak_bytes is not None:
+            args['peak_bytes'] = record.peak_bytes
+        events.append({
+            'name': record.name,
+            'cat': record.name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': record.start * 1e6,
+            'dur': record.wall * 1e6,
+            'pid': record.pid,
+            'tid': record.tid,
+            'args': args,
+        })
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
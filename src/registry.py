@@ -0,0 +1,65 @@
+import importlib
+
+# Backends are registered as "module:function" strings and imported on first use,
+# so heavy dependencies (PyMuPDF, fpdf2) are only loaded when a paper or report needs them.
+# Relative module names are resolved against this package.
+
+# File extension -> (target, options the analyzer accepts besides file path and phrases)
+_ANALYZERS = {}
+# Output format -> (target, report file extension)
+_RENDERERS = {}
+_loaded = {}
+
+def _load(target):
+    """Imports and returns the function named by a "module:function" target."""
+    if target not in _loaded:
+        module_name, _, function_name = target.partition(':')
+        module = importlib.import_module(module_name, __package__)
+        _loaded[target] = getattr(module, function_name)
+    return _loaded[target]
+
+def register_analyzer(extension, target, options=()):
+    """
+    Registers target ("module:function") as the analyzer for files with the
+    given extension. It is called as function(path, phrases=..., **options),
+    where options is limited to the names listed here (e.g. 'page_workers').
+    """
+    _ANALYZERS[extension.lower()] = (target, tuple(options))
+
+def register_renderer(output_format, target, extension):
+    """
+    Registers target ("module:function") as the writer for output_format,
+    called as function(report_data, output_path). extension is the report
+    file extension, e.g. '.pdf'.
+    """
+    _RENDERERS[output_format] = (target, extension)
+
+def supported_extensions():
+    return tuple(_ANALYZERS)
+
+def supported_formats():
+    return tuple(_RENDERERS)
+
+def get_analyzer(extension):
+    """Returns (analyzer function, accepted option names), importing its module if needed."""
+    target, options = _ANALYZERS[extension.lower()]
+    return _load(target), options
+
+def analyzer_options(extension):
+    """Returns the option names the analyzer for extension accepts, without importing it."""
+    return _ANALYZERS[extension.lower()][1]
+
+def get_renderer(output_format):
+    """Returns the writer function for output_format, importing its module if needed."""
+    return _load(_RENDERERS[output_format][0])
+
+def renderer_extension(output_format):
+    return _RENDERERS[output_format][1]
+
+register_analyzer('.pdf', '.pdf_analyzer:analyze_pdf_file', options=('page_workers', 'references_only', 'section_synonyms'))
+register_analyzer('.tex', '.latex_analyzer:analyze_tex_file')
+
+register_renderer('pdf', '.report_writers:write_pdf_report', '.pdf')
+register_renderer('json', '.report_writers:write_json_report', '.json')
+register_renderer('ndjson', '.report_writers:write_ndjson_report', '.ndjson')
+register_renderer('html', '.report_writers:write_html_report', '.html')
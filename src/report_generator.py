@@ -1,16 +1,68 @@
+import os
+from itertools import islice
 from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+from fpdf.fpdf import SubsetMap
 from datetime import datetime
+from .budget import describe_timeouts
+from .profiling import stage
+
+# The Roboto TTFs ship in the project root, one level above this package
+FONT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FONT_FILES = {"": "Roboto-Regular.ttf", "B": "Roboto-Bold.ttf", "I": "Roboto-Italic.ttf"}
+
+# Parsed font entries shared by every PDFReport in this process, keyed by fpdf font key
+_parsed_fonts = {}
+
+# Entries of each findings list printed in full; the rest go to the appendix table (None: no limit)
+DEFAULT_INLINE_LIMIT = 200
+# Body lines laid out per multi_cell call, so long sections are never built as one string
+_CHUNK_LINES = 50
+# Width of the number column of the appendix table, in mm
+_APPENDIX_NUMBER_WIDTH = 16
+
+def load_fonts():
+    """
+    Parses the Roboto font files once per process and returns the resulting
+    fpdf font entries. Later calls return the already parsed entries.
+    """
+    if not _parsed_fonts:
+        with stage('report.parse_fonts'):
+            loader = FPDF()
+            for style, file_name in FONT_FILES.items():
+                loader.add_font("Roboto", style, os.path.join(FONT_DIR, file_name))
+            _parsed_fonts.update(loader.fonts)
+    return _parsed_fonts
+
+def clear_font_cache():
+    """Drops the parsed fonts so the next report parses the font files again."""
+    _parsed_fonts.clear()
 
 class PDFReport(FPDF):
-    def __init__(self, paper_title="Untitled Paper", paper_author="Unknown Author", analysis_date=None):
+    def __init__(self, paper_title="Untitled Paper", paper_author="Unknown Author", analysis_date=None,
+                 inline_limit=DEFAULT_INLINE_LIMIT):
         super().__init__()
         self.paper_title = paper_title
         self.paper_author = paper_author
         self.analysis_date = analysis_date if analysis_date else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.inline_limit = inline_limit
+        self._overflow = []  # (list title, items, first index left for the appendix)
         self.set_auto_page_break(auto=True, margin=15)
-        self.add_font("Roboto", "", "Roboto-Regular.ttf")
-        self.add_font("Roboto", "B", "Roboto-Bold.ttf")
-        self.add_font("Roboto", "I", "Roboto-Italic.ttf")
+        self._add_shared_fonts()
+
+    def _add_shared_fonts(self):
+        """
+        Registers the process-wide parsed fonts instead of calling add_font,
+        which would re-parse every TTF file. Only the per-document parts of an
+        fpdf 2.7 font entry (its index and glyph subset) are created fresh; the
+        character widths and font descriptor are shared read-only.
+        """
+        # Same initial subset as FPDF.add_font: null, space and the page-number alias
+        initial_chars = "\x00 "
+        if self.str_alias_nb_pages:
+            initial_chars += "0123456789" + self.str_alias_nb_pages
+        for fontkey, font in load_fonts().items():
+            self.fonts[fontkey] = dict(font, i=len(self.fonts) + 1, subset=SubsetMap(map(ord, initial_chars)))
 
     def header(self):
         if self.page_no() > 1: # Don't show header on the title page
@@ -35,18 +87,100 @@ class PDFReport(FPDF):
         self.cell(0, 10, title, 0, 1, 'L', 1)
         self.ln(5)
 
-    def chapter_body(self, body):
+    def chapter_body(self, lines):
+        """
+        Writes body lines in chunks of _CHUNK_LINES per multi_cell call, consuming
+        lines as it goes. Returns the number of characters written.
+        """
         self.set_font('Roboto', '', 11)
         self.set_text_color(0, 0, 0) # Black text
-        self.multi_cell(0, 6, body)
+        written = 0
+        while True:
+            chunk = list(islice(lines, _CHUNK_LINES))
+            if not chunk:
+                break
+            text = "\n".join(chunk)
+            written += len(text)
+            self.multi_cell(0, 6, text, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         self.ln(5)
+        return written
 
     def add_section(self, title, content):
-        self.add_page()
-        self.chapter_title(title)
-        self.chapter_body(content)
+        """
+        Adds a section on a new page. content is a string or an iterable of
+        lines, which is streamed into the page rather than joined first.
+        """
+        lines = iter(content.split("\n") if isinstance(content, str) else content)
+        with stage('report.layout') as frame:
+            self.add_page()
+            self.chapter_title(title)
+            frame.input_size = self.chapter_body(lines)
+
+    def finding_lines(self, title, items, numbered=False, quote=False):
+        """
+        Yields the lines listing items ("- item", or "1. item" if numbered), up
+        to inline_limit of them. Any further items are kept for the appendix
+        table and replaced by a line pointing to it.
+        """
+        limit = len(items) if self.inline_limit is None else self.inline_limit
+        for number, item in enumerate(islice(items, limit), 1):
+            item = f'"{item}"' if quote else item
+            yield f"{number}. {item}" if numbered else f"- {item}"
+        if len(items) > limit:
+            self._overflow.append((title, items, limit))
+            yield f"... and {len(items) - limit} more, listed in the appendix under \"{title}\"."
+
+    def _fit_width(self, text, width):
+        """Shortens text with '...' so it fits in width at the current font."""
+        if self.get_string_width(text) <= width:
+            return text
+        end = len(text)
+        while end > 0:
+            end = min(end - 1, int(end * width / self.get_string_width(text[:end] + "...")))
+            if self.get_string_width(text[:end] + "...") <= width:
+                break
+        return text[:end].rstrip() + "..."
+
+    def add_overflow_appendix(self):
+        """
+        Lists the findings held back by finding_lines in a compact table, one
+        line per finding, numbered as they would have been inline. Long
+        findings are shortened; the JSON and HTML reports keep them in full.
+        """
+        if not self._overflow:
+            return
+        with stage('report.appendix', sum(len(items) - start for _, items, start in self._overflow)):
+            self.add_page()
+            self.chapter_title("Appendix: Additional Findings")
+            self.set_font('Roboto', '', 10)
+            self.multi_cell(0, 5, f"Only the first {self.inline_limit} entries of each list are shown in the report "
+                                  "body. The remaining entries follow, one line each; long entries are shortened.",
+                            new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            text_width = self.epw - _APPENDIX_NUMBER_WIDTH
+            for title, items, start in self._overflow:
+                self.ln(4)
+                self.set_font('Roboto', 'B', 11)
+                self.cell(0, 7, f"{title} ({len(items) - start} more)", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+                self.set_font('Roboto', 'B', 8)
+                self.set_fill_color(230, 230, 250)
+                self.cell(_APPENDIX_NUMBER_WIDTH, 5, "#", fill=True)
+                self.cell(0, 5, "Finding", fill=True, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+                self.set_font('Roboto', '', 8)
+                self.set_fill_color(245, 245, 245)
+                for number, item in enumerate(islice(items, start, None), start + 1):
+                    # Alternate rows are shaded so long tables stay readable
+                    shaded = number % 2 == 0
+                    self.cell(_APPENDIX_NUMBER_WIDTH, 4.5, str(number), fill=shaded)
+                    self.cell(0, 4.5, self._fit_width(" ".join(str(item).split()), text_width), fill=shaded,
+                              new_x=XPos.LMARGIN, new_y=YPos.NEXT)
 
-def create_report(report_data, output_path):
+def create_report(report_data, output_path, inline_limit=DEFAULT_INLINE_LIMIT):
+    """
+    Renders report_data as a PDF report. Each findings list shows at most
+    inline_limit entries in its section (None for all); the rest are listed
+    in a compact appendix table, so rendering time stays linear in the number
+    of findings.
+    """
     # Retrieve metadata, providing empty string as default if key is missing
     paper_title = report_data.get('metadata', {}).get('title', '')
     paper_author = report_data.get('metadata', {}).get('author', '')
@@ -59,7 +193,7 @@ def create_report(report_data, output_path):
     if not paper_author.strip():
         paper_author = "N/A"
 
-    pdf = PDFReport(paper_title, paper_author, analysis_date)
+    pdf = PDFReport(paper_title, paper_author, analysis_date, inline_limit)
     pdf.add_page()
 
     # Title Page
@@ -88,6 +222,11 @@ def create_report(report_data, output_path):
     average_reference_age = report_data.get('average_reference_age', "N/A")
     old_references_percentage = report_data.get('old_references_percentage', "0.0%")
 
+    timeouts = report_data.get('timeouts', [])
+    if timeouts:
+        summary_content += "\n\nWarning: The analysis ran out of time, so these results are partial:"
+        for line in describe_timeouts(timeouts):
+            summary_content += f"\n- {line}"
     if missing_sections:
         summary_content += f"\n\nCritical: Missing sections detected: {', '.join(missing_sections)}."
     if unresolved_citations:
@@ -104,46 +243,43 @@ def create_report(report_data, output_path):
     # Detailed Analysis Sections
 
     # Structural Analysis
-    structural_content = ""
-    if missing_sections:
-        structural_content += "The following standard sections were identified as missing or not clearly defined:\n"
-        for section in missing_sections:
-            structural_content += f"- {section}\n"
-    else:
-        structural_content += "All standard academic sections (Abstract, Introduction, Methods, Results, Discussion, References) appear to be present.\n"
-    pdf.add_section("2. Structural Analysis", structural_content)
+    def structural_lines():
+        if missing_sections:
+            yield "The following standard sections were identified as missing or not clearly defined:"
+            yield from pdf.finding_lines("Missing sections", missing_sections)
+        else:
+            yield "All standard academic sections (Abstract, Introduction, Methods, Results, Discussion, References) appear to be present."
+    pdf.add_section("2. Structural Analysis", structural_lines())
 
     # Citation Analysis
-    citation_content = ""
-    if report_data.get('citation_count') is not None:
-        citation_content += f"Total potential in-text citations (PDF analysis): {report_data['citation_count']}\n\n"
+    def citation_lines():
+        if report_data.get('citation_count') is not None:
+            yield f"Total potential in-text citations (PDF analysis): {report_data['citation_count']}"
+            yield ""
 
-    if unresolved_citations:
-        citation_content += "Unresolved Citations (cited in text but not found in bibliography):\n"
-        for citation in unresolved_citations:
-            citation_content += f"- {citation}\n"
-        citation_content += "\n"
-    else:
-        citation_content += "All in-text citations seem to have corresponding entries in the bibliography.\n\n"
+        if unresolved_citations:
+            yield "Unresolved Citations (cited in text but not found in bibliography):"
+            yield from pdf.finding_lines("Unresolved citations", unresolved_citations)
+        else:
+            yield "All in-text citations seem to have corresponding entries in the bibliography."
+        yield ""
 
-    if unused_references:
-        citation_content += "Unused References (in bibliography but not cited in text):\n"
-        for reference in unused_references:
-            citation_content += f"- {reference}\n"
-        citation_content += "\n"
-    else:
-        citation_content += "All bibliography entries seem to be cited in the text.\n\n"
-    pdf.add_section("3. Citation Analysis", citation_content)
+        if unused_references:
+            yield "Unused References (in bibliography but not cited in text):"
+            yield from pdf.finding_lines("Unused references", unused_references)
+        else:
+            yield "All bibliography entries seem to be cited in the text."
+    pdf.add_section("3. Citation Analysis", citation_lines())
 
     # Missing Citation Check
-    missing_citation_check_content = ""
-    if missing_citation_sentences:
-        missing_citation_check_content += "The following sentences contain strong claims or statements that may require a citation:\n"
-        for i, sentence in enumerate(missing_citation_sentences):
-            missing_citation_check_content += f"{i+1}. \"{sentence}\"\n"
-    else:
-        missing_citation_check_content += "No sentences with potential missing citations were identified based on common heuristics.\n"
-    pdf.add_section("4. Missing Citation Check", missing_citation_check_content)
+    def missing_citation_lines():
+        if missing_citation_sentences:
+            yield "The following sentences contain strong claims or statements that may require a citation:"
+            yield from pdf.finding_lines("Sentences that may be missing citations", missing_citation_sentences,
+                                         numbered=True, quote=True)
+        else:
+            yield "No sentences with potential missing citations were identified based on common heuristics."
+    pdf.add_section("4. Missing Citation Check", missing_citation_lines())
 
     # Reference Age Analysis
     reference_age_content = ""
@@ -156,4 +292,7 @@ def create_report(report_data, output_path):
         reference_age_content += "Reference age analysis not available (e.g., no references found or could not be parsed).\n"
     pdf.add_section("5. Reference Age Analysis", reference_age_content)
 
-    pdf.output(output_path, 'F')
\ No newline at end of file
+    pdf.add_overflow_appendix()
+
+    with stage('report.output'):
+        pdf.output(output_path, 'F')
\ No newline at end of file
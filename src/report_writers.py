@@ -0,0 +1,146 @@
+import html
+import json
+import os
+from datetime import datetime
+from .budget import describe_timeouts
+from .profiling import stage
+from .registry import get_renderer, renderer_extension, supported_formats
+
+def write_pdf_report(report_data, output_path):
+    """Renders the formatted PDF report with fpdf2 (the slowest writer)."""
+    # Imported here so JSON/HTML-only runs never load fpdf
+    from .report_generator import create_report
+    create_report(report_data, output_path)
+
+def write_json_report(report_data, output_path):
+    """Serializes report_data as a single JSON document."""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report_data, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+def append_ndjson_record(output_path, record):
+    """Appends one record as a single JSON line, for streaming many papers into one file."""
+    with open(output_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def write_ndjson_report(report_data, output_path):
+    """Appends report_data as one line of an NDJSON file."""
+    append_ndjson_record(output_path, report_data)
+
+def _html_list(items, ordered=False, quote=False):
+    tag = 'ol' if ordered else 'ul'
+    entries = "".join(f"<li>{'&quot;' if quote else ''}{html.escape(str(item))}{'&quot;' if quote else ''}</li>"
+                      for item in items)
+    return f"<{tag}>{entries}</{tag}>"
+
+def write_html_report(report_data, output_path):
+    """Writes a lightweight, self-contained single-file HTML report."""
+    metadata = report_data.get('metadata') or {}
+    paper_title = str(metadata.get('title') or '').strip() or "N/A"
+    paper_author = str(metadata.get('author') or '').strip() or "N/A"
+    analysis_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    missing_sections = report_data.get('missing_sections', [])
+    unresolved_citations = report_data.get('unresolved_citations', [])
+    unused_references = report_data.get('unused_references', [])
+    missing_citation_sentences = report_data.get('missing_citation_sentences', [])
+    average_reference_age = report_data.get('average_reference_age', "N/A")
+    old_references_percentage = report_data.get('old_references_percentage', "0.0%")
+
+    summary = []
+    for line in describe_timeouts(report_data.get('timeouts', [])):
+        summary.append(f"<li class='critical'>Warning: The analysis ran out of time, so these results are partial "
+                       f"({html.escape(line)}).</li>")
+    if missing_sections:
+        summary.append(f"<li class='critical'>Critical: Missing sections detected: {html.escape(', '.join(missing_sections))}.</li>")
+    if unresolved_citations:
+        summary.append(f"<li class='critical'>Critical: Unresolved citations found: {len(unresolved_citations)}.</li>")
+    if missing_citation_sentences:
+        summary.append(f"<li>Suggestion: {len(missing_citation_sentences)} sentences may be missing citations.</li>")
+    if unused_references:
+        summary.append(f"<li>Suggestion: {len(unused_references)} unused references found.</li>")
+    if average_reference_age != "N/A":
+        summary.append(f"<li>Suggestion: Average reference age is {html.escape(average_reference_age)}. "
+                       f"{html.escape(old_references_percentage)} of references are older than 10 years.</li>")
+
+    sections = []
+    sections.append(("1. Report Summary",
+                     "<p>This report provides an automated analysis of the academic paper for common review checkpoints.</p>"
+                     + (f"<ul>{''.join(summary)}</ul>" if summary else "<p>No issues found.</p>")))
+
+    if missing_sections:
+        structural = ("<p>The following standard sections were identified as missing or not clearly defined:</p>"
+                      + _html_list(missing_sections))
+    else:
+        structural = "<p>All standard academic sections (Abstract, Introduction, Methods, Results, Discussion, References) appear to be present.</p>"
+    sections.append(("2. Structural Analysis", structural))
+
+    citation = ""
+    if report_data.get('citation_count') is not None:
+        citation += f"<p>Total potential in-text citations (PDF analysis): {report_data['citation_count']}</p>"
+    if unresolved_citations:
+        citation += "<p>Unresolved Citations (cited in text but not found in bibliography):</p>" + _html_list(unresolved_citations)
+    else:
+        citation += "<p>All in-text citations seem to have corresponding entries in the bibliography.</p>"
+    if unused_references:
+        citation += "<p>Unused References (in bibliography but not cited in text):</p>" + _html_list(unused_references)
+    else:
+        citation += "<p>All bibliography entries seem to be cited in the text.</p>"
+    sections.append(("3. Citation Analysis", citation))
+
+    if missing_citation_sentences:
+        missing = ("<p>The following sentences contain strong claims or statements that may require a citation:</p>"
+                   + _html_list(missing_citation_sentences, ordered=True, quote=True))
+    else:
+        missing = "<p>No sentences with potential missing citations were identified based on common heuristics.</p>"
+    sections.append(("4. Missing Citation Check", missing))
+
+    if average_reference_age != "N/A":
+        age = (f"<p>Average age of references: {html.escape(average_reference_age)}<br>"
+               f"Percentage of references older than 10 years: {html.escape(old_references_percentage)}<br>"
+               f"Number of references older than 10 years: {report_data.get('old_references_count', 0)}</p>"
+               "<p>Consider reviewing older references for more recent and relevant literature.</p>")
+    else:
+        age = "<p>Reference age analysis not available (e.g., no references found or could not be parsed).</p>"
+    sections.append(("5. Reference Age Analysis", age))
+
+    body = "".join(f"<section><h2>{html.escape(title)}</h2>{content}</section>" for title, content in sections)
+    document = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Academic Paper Review Report - {html.escape(paper_title)}</title>
+<style>
+body {{ font-family: Roboto, Arial, sans-serif; max-width: 50em; margin: 2em auto; color: #000; line-height: 1.5; }}
+header {{ text-align: center; margin-bottom: 2em; }}
+h2 {{ background: #e6e6fa; padding: 0.2em 0.4em; font-size: 1.3em; }}
+.critical {{ color: #a00000; }}
+footer {{ color: #808080; font-style: italic; font-size: 0.8em; text-align: center; margin-top: 3em; }}
+</style>
+</head>
+<body>
+<header>
+<h1>Academic Paper Review Report</h1>
+<p>Paper Title: {html.escape(paper_title)}<br>Author: {html.escape(paper_author)}</p>
+<p><em>Analysis Date: {analysis_date}</em></p>
+</header>
+{body}
+<footer>Generated on {analysis_date}</footer>
+</body>
+</html>
+"""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(document)
+
+def write_report(report_data, output_path, output_format):
+    """Writes report_data to output_path with the writer registered for output_format."""
+    if output_format not in supported_formats():
+        raise ValueError(f"Unsupported report format '{output_format}'. Choose from: {', '.join(supported_formats())}.")
+    writer = get_renderer(output_format)
+    with stage(f'report.write_{output_format}'):
+        writer(report_data, output_path)
+
+def report_path_for_format(output_path, output_format):
+    """Swaps the extension of output_path for the one belonging to output_format."""
+    root, _ = os.path.splitext(output_path)
+    return root + renderer_extension(output_format)
@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+
+DEFAULT_CACHE_SIZE_MB = 256
+
+def default_cache_dir():
+    """Returns the per-user cache directory, honoring XDG_CACHE_HOME."""
+    base_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base_dir, 'academic_paper_review_helper')
+
+class ResultCache:
+    """
+    Content-addressed on-disk cache of report_data dicts.
+    Each entry is a JSON file named after its key. Hits refresh the file's
+    modification time, and the least recently used entries are evicted once
+    the cache grows beyond max_bytes.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_CACHE_SIZE_MB * 1024 * 1024):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Returns the cached report_data for key, or None on a miss."""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                report_data = json.load(f)
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            return None
+        return report_data
+
+    def put(self, key, report_data, evict=True):
+        """
+        Stores report_data under key, then evicts old entries if needed.
+        Callers storing many small entries in a row can pass evict=False and
+        call evict() once at the end.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(report_data, f)
+            os.replace(tmp_path, self._entry_path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total_size = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total_size += stat.st_size
+        if total_size <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total_size -= size
+            if total_size <= self.max_bytes:
+                break
+
+    def clear(self):
+        """
+        Deletes every cached entry and any temporary file left by an
+        interrupted put(). Nothing else in cache_dir is touched, since it may
+        be a user-chosen directory or hold other caches (e.g. BibTeX indexes).
+        """
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(('.json', '.tmp')) and entry.is_file(follow_symlinks=False):
+                        try:
+                            os.remove(entry.path)
+                        except FileNotFoundError:
+                            continue
+        except FileNotFoundError:
+            pass
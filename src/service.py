@@ -0,0 +1,293 @@
+import json
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from .analysis import analyze_file
+from .registry import get_analyzer, renderer_extension, supported_extensions, supported_formats
+from .report_writers import write_report
+
+DEFAULT_PORT = 8765
+# Largest accepted upload, in bytes
+MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+# Completed jobs kept for the latency percentiles
+_LATENCY_WINDOW = 1000
+
+CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'html': 'text/html; charset=utf-8',
+}
+
+class ServiceBusy(Exception):
+    """Raised when the job queue is full; the HTTP layer answers 503."""
+
+def _warm_worker(preload_formats):
+    """Pool initializer: imports every analyzer backend and parses the report fonts once per worker."""
+    for extension in supported_extensions():
+        get_analyzer(extension)
+    if 'pdf' in preload_formats:
+        from .report_generator import load_fonts
+        load_fonts()
+
+def _run_job(file_path, output_format, cache, phrases, page_workers, time_budget=None, stage_budget=None,
+             section_synonyms=None):
+    """
+    Runs in a warm worker: analyzes file_path and, if output_format is given,
+    renders the report. Returns (report_data, report bytes or None).
+    """
+    report_data = analyze_file(file_path, page_workers=page_workers, cache=cache, phrases=phrases,
+                               time_budget=time_budget, stage_budget=stage_budget, section_synonyms=section_synonyms)
+    if not output_format:
+        return report_data, None
+    fd, report_path = tempfile.mkstemp(suffix=renderer_extension(output_format))
+    os.close(fd)
+    try:
+        write_report(report_data, report_path, output_format)
+        with open(report_path, 'rb') as f:
+            return report_data, f.read()
+    finally:
+        os.remove(report_path)
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+class AnalysisService:
+    """
+    A pool of warm worker processes (analyzers imported, fonts parsed) that
+    runs analysis jobs. At most `workers` jobs run at once and `max_queue`
+    more may wait; beyond that analyze() raises ServiceBusy. time_budget and
+    stage_budget bound each job's analysis (see analyze_file), so one
+    pathological paper cannot hold a worker indefinitely.
+    """
+
+    def __init__(self, workers=None, max_queue=None, cache=None, phrases=None, page_workers=None,
+                 preload_formats=('pdf',), time_budget=None, stage_budget=None, section_synonyms=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = self.workers * 4 if max_queue is None else max_queue
+        self.cache = cache
+        self.phrases = phrases
+        self.page_workers = page_workers
+        self.preload_formats = tuple(preload_formats)
+        self.time_budget = time_budget
+        self.stage_budget = stage_budget
+        self.section_synonyms = section_synonyms
+        self.upload_dir = tempfile.mkdtemp(prefix='paper_review_uploads_')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._latencies = deque(maxlen=_LATENCY_WINDOW)
+        self._started = time.time()
+        self._executor = self._new_executor()
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker,
+                                   initargs=(self.preload_formats,))
+
+    def analyze(self, file_path, output_format=None):
+        """
+        Queues one job and blocks until it finishes. Returns (report_data,
+        report bytes or None). Raises ServiceBusy when the queue is full and
+        re-raises errors from the analysis itself.
+        """
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise ServiceBusy(f"Queue is full ({self.max_queue} jobs waiting).")
+            self._pending += 1
+            executor = self._executor
+        start = time.perf_counter()
+        failed = True
+        try:
+            future = executor.submit(_run_job, file_path, output_format, self.cache, self.phrases,
+                                     self.page_workers, self.time_budget, self.stage_budget, self.section_synonyms)
+            result = future.result()
+            failed = False
+            return result
+        except BrokenProcessPool:
+            # A worker died (e.g. a crash inside PyMuPDF); replace the pool so later jobs still run
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = self._new_executor()
+            executor.shutdown(wait=False)
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+                    self._latencies.append(time.perf_counter() - start)
+
+    def analyze_upload(self, data, filename, output_format=None):
+        """Like analyze(), for uploaded file contents; filename supplies the extension."""
+        _, extension = os.path.splitext(os.path.basename(filename or ''))
+        if extension.lower() not in supported_extensions():
+            raise ValueError(f"Unsupported file type '{extension}'. "
+                             f"Please provide a {' or '.join(supported_extensions())} file.")
+        fd, upload_path = tempfile.mkstemp(suffix=extension.lower(), dir=self.upload_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            return self.analyze(upload_path, output_format)
+        finally:
+            os.remove(upload_path)
+
+    def metrics(self):
+        """Returns queue depth, job counters and latency percentiles (ms) over recent jobs."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            pending = self._pending
+            metrics = {
+                'workers': self.workers,
+                'running': min(pending, self.workers),
+                'queue_depth': max(0, pending - self.workers),
+                'queue_capacity': self.max_queue,
+                'completed': self._completed,
+                'failed': self._failed,
+                'rejected': self._rejected,
+                'uptime_seconds': round(time.time() - self._started, 1),
+            }
+        metrics['latency_ms'] = {
+            name: (round(_percentile(latencies, percent) * 1000, 1) if latencies else None)
+            for name, percent in (('p50', 50), ('p95', 95), ('p99', 99))
+        }
+        metrics['latency_samples'] = len(latencies)
+        return metrics
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(self.upload_dir, ignore_errors=True)
+
+class _ServiceRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health              liveness check
+    GET  /metrics             queue depth, counters and latency percentiles
+    POST /analyze             JSON body {"path": ..., "format": ...}, or the raw
+                              file bytes with ?filename=paper.pdf[&format=...]
+    Without a format the response is {"report_data": ...}; with one it is the
+    rendered report.
+    """
+    server_version = "PaperReviewService/1.0"
+
+    def _send(self, status, body, content_type='application/json', headers=None):
+        if not isinstance(body, bytes):
+            body = (json.dumps(body, ensure_ascii=False) + "\n").encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message, headers=None):
+        self._send(status, {'error': message}, headers=headers)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/health':
+            self._send(200, {'status': 'ok', 'workers': self.server.service.workers})
+        elif path == '/metrics':
+            self._send(200, self.server.service.metrics())
+        else:
+            self._error(404, f"Unknown endpoint {path}.")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/analyze':
+            self._error(404, f"Unknown endpoint {url.path}.")
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_UPLOAD_BYTES:
+            self._error(413, f"Request body exceeds {MAX_UPLOAD_BYTES} bytes.")
+            return
+        body = self.rfile.read(length)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        service = self.server.service
+
+        try:
+            if self.headers.get('Content-Type', '').split(';')[0].strip() == 'application/json':
+                job = json.loads(body or b'{}')
+                output_format = job.get('format') or query.get('format')
+                if not job.get('path'):
+                    raise ValueError("Missing 'path' in the request body.")
+                file_path = os.path.abspath(job['path'])
+                if not os.path.isfile(file_path):
+                    self._error(404, f"File not found: {job['path']}")
+                    return
+                self._check_format(output_format)
+                report_data, report = service.analyze(file_path, output_format)
+            else:
+                output_format = query.get('format')
+                if not query.get('filename'):
+                    raise ValueError("Uploads need a ?filename= query parameter with the file extension.")
+                self._check_format(output_format)
+                report_data, report = service.analyze_upload(body, query['filename'], output_format)
+        except ServiceBusy as e:
+            self._error(503, str(e), headers={'Retry-After': '1'})
+        except ValueError as e:
+            self._error(400, str(e))
+        except Exception as e:
+            self._error(500, f"{type(e).__name__}: {e}")
+        else:
+            if report is None:
+                self._send(200, {'report_data': report_data})
+            else:
+                self._send(200, report, CONTENT_TYPES.get(output_format, 'application/octet-stream'))
+
+    def _check_format(self, output_format):
+        if output_format and output_format not in supported_formats():
+            raise ValueError(f"Unsupported report format '{output_format}'. "
+                             f"Choose from: {', '.join(supported_formats())}.")
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+def _stop_on_sigterm(signum, frame):
+    raise KeyboardInterrupt
+
+def serve(host='127.0.0.1', port=DEFAULT_PORT, workers=None, max_queue=None, cache=None, phrases=None,
+          page_workers=None, preload_formats=('pdf',), quiet=False, time_budget=None, stage_budget=None,
+          section_synonyms=None):
+    """
+    Runs the analysis service until interrupted (Ctrl+C or SIGTERM). The
+    worker pool is warmed up before the first request is accepted.
+    """
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _stop_on_sigterm)
+    service = AnalysisService(workers, max_queue, cache, phrases, page_workers, preload_formats, time_budget,
+                              stage_budget, section_synonyms)
+    server = ThreadingHTTPServer((host, port), _ServiceRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.quiet = quiet
+    # Start every worker now so the first jobs do not pay for imports and font parsing
+    warmups = [service._executor.submit(time.sleep, 0.05) for _ in range(service.workers)]
+    for future in warmups:
+        future.result()
+    print(f"Analysis service listening on http://{host}:{server.server_address[1]} "
+          f"with {service.workers} warm workers (queue limit {service.max_queue}). Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping analysis service.")
+    finally:
+        server.server_close()
+        service.shutdown()
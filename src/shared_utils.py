@@ -1,35 +1,114 @@
 import re
+from datetime import datetime
+from .document_model import DocumentModel
+from .profiling import stage
 
-def check_for_missing_citations(text):
+# Sections every paper is expected to have, in document order
+STANDARD_SECTIONS = ["abstract", "introduction", "methods", "results", "discussion", "references"]
+
+# A DOI such as 10.1000/xyz123, up to the next space or list separator
+_DOI_PATTERN = re.compile(r'\b10\.\d{4,9}/[^\s,;]+')
+# A plausible publication year, shared by every reference-year extractor so
+# a reference gets the same age whether it comes from a PDF, \bibitem or .bib
+REFERENCE_YEAR = re.compile(r'(?:19|20)\d{2}')
+
+def load_phrase_list(path):
+    """Reads trigger phrases from a text file, one per line; '#' starts a comment."""
+    phrases = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            phrase = line.split('#', 1)[0].strip()
+            if phrase:
+                phrases.append(phrase)
+    return phrases
+
+def load_section_synonyms(path):
+    """
+    Reads extra section heading synonyms from a text file, one
+    "section: heading" pair per line (e.g. "methods: study design"); '#'
+    starts a comment. Returns {section: [heading, ...]}. Raises ValueError
+    for a malformed line or a section that is not a standard one.
+    """
+    synonyms = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            section, _, heading = line.partition(':')
+            section, heading = section.strip().lower(), heading.strip()
+            if section not in STANDARD_SECTIONS or not heading:
+                raise ValueError(f"{path}:{line_number}: expected 'section: heading' with a section out of "
+                                 f"{', '.join(STANDARD_SECTIONS)}")
+            synonyms.setdefault(section, []).append(heading)
+    return synonyms
+
+def find_missing_citations(model):
+    """
+    Returns (sentence, start, end) for every sentence of a DocumentModel that
+    contains a trigger phrase but no citation marker; sentence is stripped of
+    surrounding whitespace and start/end are its offsets in the text.
+    """
+    findings = []
+    with stage('text.missing_citations', len(model.trigger_sentences)):
+        for index, sentence in zip(model.trigger_sentences, model.trigger_texts):
+            start, end = model.sentence_starts[index], model.sentence_ends[index]
+            if not model.has_citation(start, end):
+                stripped = sentence.strip()
+                start += len(sentence) - len(sentence.lstrip())
+                findings.append((stripped, start, start + len(stripped)))
+    return findings
+
+def check_for_missing_citations(text, phrases=None):
     """
     Scans text for sentences containing common research phrases
     that should be followed by a citation and flags those that are not.
+    Accepts either a string or an iterable of text chunks (e.g. PDF pages).
+    phrases replaces DEFAULT_CITATION_PHRASES; large lists cost little extra.
+    """
+    model = DocumentModel.from_text(text, phrases)
+    return [sentence for sentence, _, _ in find_missing_citations(model)]
+
+def reference_entry(text, key=None, year=None, doi=None):
+    """
+    Builds one entry of report_data['references'] from the text of a
+    bibliography entry (or a BibTeX title), with its whitespace collapsed.
+    The year and DOI are taken from the text unless given.
+    """
+    text = " ".join((text or "").split())
+    if year is None:
+        year_match = REFERENCE_YEAR.search(text)
+        year = int(year_match.group(0)) if year_match else None
+    if doi is None:
+        doi_match = _DOI_PATTERN.search(text)
+        doi = doi_match.group(0).rstrip('.') if doi_match else None
+    return {'key': key, 'text': text, 'year': year, 'doi': doi}
+
+def reference_age_analysis(reference_years, current_year=None):
+    """
+    Summarizes publication years into the report_data reference-age fields:
+    average age, and the number and share of references older than 10 years.
     """
-    keywords = [
-        "studies show", "research indicates", "it is known",
-        "evidence suggests", "experts agree", "it has been demonstrated",
-        "the prevailing view is", "is widely accepted", "has been found to"
-    ]
-    sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|\n)\s', text)
-    missing_citation_sentences = []
-    for sentence in sentences:
-        if any(keyword in sentence.lower() for keyword in keywords):
-            if not (re.search(r'\\cite\{.*?\}', sentence) or
-                    re.search(r'\[\d+\]', sentence) or
-                    re.search(r'\([\w\s.,;]+,\s*\d{4}\)', sentence) or
-                    re.search(r'\[[\w\s.,;]+,\s*\d{4}\]', sentence)):
-                missing_citation_sentences.append(sentence.strip())
-    return missing_citation_sentences
+    current_year = current_year or datetime.now().year
+    if not reference_years:
+        return {
+            'average_reference_age': "N/A",
+            'old_references_count': 0,
+            'old_references_percentage': "0.0%",
+        }
+    average_age = current_year - (sum(reference_years) / len(reference_years))
+    old_references = [year for year in reference_years if (current_year - year) > 10]
+    return {
+        'average_reference_age': f"{average_age:.1f} years",
+        'old_references_count': len(old_references),
+        'old_references_percentage': f"{len(old_references) / len(reference_years) * 100:.1f}%",
+    }
 
 def check_structure(found_sections):
     """Checks for the presence of standard academic paper sections."""
-    standard_sections = [
-        "abstract", "introduction", "methods",
-        "results", "discussion", "references"
-    ]
     found_sections_lower = [str(s).lower() for s in found_sections]
     missing_sections = []
-    for standard_section in standard_sections:
+    for standard_section in STANDARD_SECTIONS:
         if standard_section not in found_sections_lower:
             missing_sections.append(standard_section.capitalize())
     return missing_sections
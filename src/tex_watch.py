@@ -0,0 +1,129 @@
+import hashlib
+import os
+import time
+from datetime import datetime
+from .latex_analyzer import _parse_tex_tree, _resolve_include, bibliography_candidates, build_tex_report, parse_tex_source
+
+def _file_signature(path):
+    """Returns (mtime_ns, size) of path, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+class TexProject:
+    """
+    Incrementally analyzes a multi-file LaTeX project. Parse results are kept
+    per file, keyed by path and validated by modification time and size (and
+    a content hash, so touching a file without editing it is free). Each
+    refresh re-reads only changed files and re-merges the per-file results.
+    The .bib databases the project names are watched too, since citations
+    are resolved against them.
+    """
+
+    def __init__(self, tex_path, phrases=None):
+        self.tex_path = os.path.abspath(tex_path)
+        self.phrases = phrases
+        self._files = {}  # abs_path -> (mtime_ns, size, content hash, parse result)
+        self._missing_includes = set()  # included files that did not exist at the last refresh
+        self._bibliographies = {}  # referenced .bib path -> (mtime_ns, size), or None if it did not exist
+
+    def _parse_file(self, abs_file_path, changed):
+        try:
+            stat = os.stat(abs_file_path)
+        except OSError as e:
+            print(f"Error reading LaTeX file {abs_file_path}: {e}")
+            return None
+        cached = self._files.get(abs_file_path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[3]
+
+        try:
+            with open(abs_file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except Exception as e:
+            print(f"Error reading LaTeX file {abs_file_path}: {e}")
+            return None
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        if cached and cached[2] == content_hash:
+            parsed = cached[3]
+        else:
+            parsed = parse_tex_source(content, self.phrases, abs_file_path)
+            changed.append(abs_file_path)
+        self._files[abs_file_path] = (stat.st_mtime_ns, stat.st_size, content_hash, parsed)
+        return parsed
+
+    def refresh(self):
+        """
+        Brings the analysis up to date with the files on disk.
+        Returns (report_data, changed_paths) where changed_paths lists the files
+        that had to be re-parsed and the .bib databases that changed.
+        """
+        changed = []
+        tree = list(_parse_tex_tree(self.tex_path, lambda path: self._parse_file(path, changed)))
+        # Forget files that are no longer part of the include tree
+        in_tree = {path for path, _ in tree}
+        for path in list(self._files):
+            if path not in in_tree:
+                del self._files[path]
+        self._missing_includes = {
+            included_path
+            for path, parsed in tree
+            for included_path in (_resolve_include(os.path.dirname(path), name) for name in parsed['includes'])
+            if not os.path.exists(included_path)
+        }
+        parsed_files = [parsed for _, parsed in tree]
+        project_dir = os.path.dirname(self.tex_path)
+        previous_bibliographies = self._bibliographies
+        self._bibliographies = {bib_path: _file_signature(bib_path)
+                                for bib_path in bibliography_candidates(parsed_files, project_dir)}
+        changed.extend(bib_path for bib_path, signature in self._bibliographies.items()
+                       if bib_path in previous_bibliographies and previous_bibliographies[bib_path] != signature)
+        return build_tex_report(parsed_files, project_dir), changed
+
+    def has_changes(self):
+        """Cheaply checks whether any known file or .bib database was modified, added or removed."""
+        for path, cached in self._files.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return True
+            if (stat.st_mtime_ns, stat.st_size) != cached[:2]:
+                return True
+        if any(_file_signature(path) != signature for path, signature in self._bibliographies.items()):
+            return True
+        return not self._files or any(os.path.exists(path) for path in self._missing_includes)
+
+def _print_update(report_data, changed, elapsed, project_dir):
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    names = ", ".join(os.path.relpath(path, project_dir) for path in changed) or "no content changes"
+    print(f"\n[{timestamp}] Updated in {elapsed * 1000:.0f} ms (re-analyzed: {names})")
+    missing_sections = report_data.get('missing_sections', [])
+    unresolved_citations = report_data.get('unresolved_citations', [])
+    print(f"Missing sections: {', '.join(missing_sections) if missing_sections else 'none'}")
+    print(f"Unresolved citations: {', '.join(unresolved_citations) if unresolved_citations else 'none'}")
+    print(f"Unused references: {len(report_data.get('unused_references', []))}")
+    print(f"Sentences that may be missing citations: {len(report_data.get('missing_citation_sentences', []))}")
+    print(f"Average reference age: {report_data.get('average_reference_age', 'N/A')}")
+
+def watch_tex_project(tex_path, interval=0.5, phrases=None):
+    """
+    Watches a LaTeX project and prints an updated summary whenever one of its
+    files changes. Runs until interrupted with Ctrl+C.
+    """
+    project = TexProject(tex_path, phrases)
+    project_dir = os.path.dirname(project.tex_path)
+    print(f"Watching {tex_path} (press Ctrl+C to stop)...")
+    first_run = True
+    try:
+        while True:
+            if project.has_changes():
+                start = time.perf_counter()
+                report_data, changed = project.refresh()
+                if changed or first_run:
+                    _print_update(report_data, changed, time.perf_counter() - start, project_dir)
+                first_run = False
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
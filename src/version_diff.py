@@ -0,0 +1,339 @@
+import bisect
+import hashlib
+import os
+import re
+from collections import Counter
+from .analysis import ANALYZER_VERSION
+from .document_model import DocumentModel
+from .profiling import stage
+from .registry import get_analyzer
+from .shared_utils import check_structure, find_missing_citations
+
+# Compares two versions of a paper. Each version is cut into units at its
+# section headings, and every unit is analyzed on its own and stored under a
+# hash of its content, so a section that is identical in both versions (or in
+# any version diffed before, with a ResultCache) is analyzed only once. PDF
+# page text is stored the same way under a hash of the page's content stream,
+# which is far cheaper to read than extracting its text.
+
+# A \chapter or \section command at the start of a line begins a new LaTeX unit
+_TEX_UNIT_START = re.compile(r'^[ \t]*\\(?:chapter|section)(?![A-Za-z])', re.MULTILINE)
+
+class _ResultStore:
+    """
+    Page and unit results shared by the two versions of a diff, kept in
+    memory and, if a ResultCache is given, on disk across runs.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.results = {}
+        self.misses = Counter()
+
+    def get(self, kind, key):
+        key = f"{kind}-{key}"
+        result = self.results.get(key)
+        if result is None and self.cache is not None:
+            result = self.cache.get(key)
+            if result is not None:
+                self.results[key] = result
+        if result is None:
+            self.misses[kind] += 1
+        return result
+
+    def put(self, kind, key, result):
+        key = f"{kind}-{key}"
+        self.results[key] = result
+        if self.cache is not None:
+            # Evicted once per diff, see diff_versions
+            with stage('cache.store'):
+                self.cache.put(key, result, evict=False)
+
+def _content_key(kind, text, phrases):
+    """Hashes a unit's content together with everything else its results depend on."""
+    digest = hashlib.sha256(f"{ANALYZER_VERSION}\0{kind}\0".encode('utf-8'))
+    if phrases is not None:
+        digest.update("\n".join(sorted(phrases)).encode('utf-8') + b"\0")
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+def sentence_fingerprint(sentence):
+    """Identifies a flagged sentence across versions, ignoring line breaks and spacing."""
+    return " ".join(sentence.split())
+
+# --- PDF ---
+
+def _page_fingerprint(page, layout, section_synonyms=None):
+    """
+    Hashes what a page's text is extracted from: its content stream and the
+    fonts it uses (without the subset prefix, which changes between builds).
+    Extra section synonyms are included, since they decide which pages have
+    their heading fonts read.
+    """
+    digest = hashlib.sha256(f"{ANALYZER_VERSION}\0{int(layout)}\0".encode('utf-8'))
+    if section_synonyms:
+        digest.update(f"{sorted(section_synonyms.items())!r}\0".encode('utf-8'))
+    digest.update(page.read_contents())
+    for _, _, _, basefont, name, encoding, *_ in page.get_fonts():
+        digest.update(f"\0{basefont.split('+')[-1]}:{name}:{encoding}".encode('utf-8'))
+    return digest.hexdigest()
+
+def _pdf_pages(pdf_path, fingerprints, layout, store, heading_table=None):
+    """
+    Yields (page_number, text, styled_headings) per page like iter_pdf_pages,
+    extracting only the pages whose fingerprint is not in the store.
+    """
+    from .pdf_analyzer import iter_pdf_pages
+    extractor = None
+    try:
+        for index, fingerprint in enumerate(fingerprints):
+            page = store.get('page', fingerprint)
+            if page is None:
+                if extractor is None:
+                    extractor = iter_pdf_pages(pdf_path, index, layout=layout, heading_table=heading_table)
+                _, text, styled_headings = next(extractor)
+                page = {'text': text,
+                        'styled_headings': sorted(styled_headings) if styled_headings is not None else None}
+                store.put('page', fingerprint, page)
+            elif extractor is not None:
+                extractor.close()
+                extractor = None
+            styled_headings = page['styled_headings']
+            yield index + 1, page['text'], set(styled_headings) if styled_headings is not None else None
+    finally:
+        if extractor is not None:
+            extractor.close()
+
+def _analyze_pdf_unit(text, phrases):
+    model = DocumentModel.from_text(text, phrases)
+    return {'findings': [[sentence, start] for sentence, start, _ in find_missing_citations(model)],
+            'citation_count': model.citation_count()}
+
+def _pdf_version(pdf_path, store, phrases, section_synonyms=None):
+    import fitz  # PyMuPDF
+    from .pdf_analyzer import STANDARD_SECTIONS, heading_table_for, outline_section_headings, page_section_headings
+
+    heading_table = heading_table_for(section_synonyms)
+    with stage('diff.fingerprint_pages'):
+        with fitz.open(pdf_path) as doc:
+            metadata = doc.metadata
+            outline_headings, layout = outline_section_headings(doc.get_toc(simple=True), heading_table)
+            fingerprints = [_page_fingerprint(page, layout, section_synonyms) for page in doc]
+
+    units = []
+    page_starts = []
+    found = set()
+    length = 0
+    heading, parts, unit_start = None, [], 0
+
+    def close_unit():
+        text = "".join(parts)
+        key = _content_key('pdf', text, phrases)
+        result = store.get('unit', key)
+        if result is None:
+            with stage('diff.analyze_unit', len(text)):
+                result = _analyze_pdf_unit(text, phrases)
+            store.put('unit', key, result)
+        units.append({'label': heading or "(before the first heading)", 'key': key, 'start': unit_start,
+                      'heading': heading, 'result': result})
+
+    for page_number, text, styled_headings in _pdf_pages(pdf_path, fingerprints, layout, store, heading_table):
+        page_starts.append(length)
+        cut = 0
+        page_headings = page_section_headings(text, styled_headings, outline_headings.get(page_number, {}),
+                                              heading_table)
+        for _, sections, page_heading, position in sorted(page_headings, key=lambda entry: entry[3]):
+            found.update(sections)
+            parts.append(text[cut:position])
+            if length + position > unit_start:
+                close_unit()
+                parts = []
+            heading, unit_start, cut = page_heading, length + position, position
+        parts.append(text[cut:])
+        length += len(text)
+    close_unit()
+
+    missing_citations = []
+    for unit in units:
+        for sentence, start in unit['result']['findings']:
+            offset = unit['start'] + start
+            page_index = max(0, bisect.bisect_right(page_starts, offset) - 1)
+            missing_citations.append({'sentence': sentence, 'page': page_index + 1, 'section': unit['heading'],
+                                      'offset': offset})
+    return {
+        'metadata': metadata,
+        'units': [(unit['label'], unit['key']) for unit in units],
+        'missing_sections': check_structure([section for section in STANDARD_SECTIONS if section in found]),
+        'unresolved_citations': [],
+        'missing_citations': missing_citations,
+        'size': {'pages': len(fingerprints), 'units': len(units)},
+    }
+
+# --- LaTeX ---
+
+def _analyze_tex_unit(text, phrases):
+    from .latex_analyzer import parse_tex_source
+    parsed = parse_tex_source(text, phrases)
+    model = parsed['model']
+    return {
+        'title': parsed['title'],
+        'author': parsed['author'],
+        'has_abstract': parsed['has_abstract'],
+        'citations': sorted(parsed['citations']),
+        'cites_all': parsed['cites_all'],
+        'bibitems': parsed['bibitems'],
+        'references': parsed['references'],
+        'includes': parsed['includes'],
+        'bibliographies': parsed['bibliographies'],
+        'section_headings': list(model.section_headings),
+        'reference_years': list(model.reference_years),
+        'findings': [[finding['sentence'], finding['line'], finding['section']]
+                     for finding in parsed['missing_citations']],
+    }
+
+def _tex_version(tex_path, store, phrases, section_synonyms=None):
+    # section_synonyms only applies to PDFs: LaTeX units start at \section commands
+    from .latex_analyzer import _parse_tex_tree, build_tex_report
+    base_dir = os.path.dirname(os.path.abspath(tex_path))
+    units = []
+
+    def parse_file(abs_file_path):
+        """Merges the unit results of one file into a parse result for build_tex_report."""
+        try:
+            with open(abs_file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except Exception as e:
+            print(f"Error reading LaTeX file {abs_file_path}: {e}")
+            return None
+        parsed = {'title': None, 'author': None, 'has_abstract': False, 'citations': set(), 'cites_all': False,
+                  'bibitems': [], 'references': [], 'includes': [], 'bibliographies': [], 'model': DocumentModel(),
+                  'missing_citations': []}
+        starts = [0] + [match.start() for match in _TEX_UNIT_START.finditer(content) if match.start() > 0]
+        line = 1
+        for start, end in zip(starts, starts[1:] + [len(content)]):
+            text = content[start:end]
+            key = _content_key('tex', text, phrases)
+            result = store.get('unit', key)
+            if result is None:
+                with stage('diff.analyze_unit', len(text)):
+                    result = _analyze_tex_unit(text, phrases)
+                store.put('unit', key, result)
+            heading = result['section_headings'][0] if _TEX_UNIT_START.match(text) and result['section_headings'] else None
+            units.append((f"{os.path.relpath(abs_file_path, base_dir)}: {heading or 'start of file'}", key))
+
+            for name in ('title', 'author'):
+                if parsed[name] is None:
+                    parsed[name] = result[name]
+            parsed['has_abstract'] = parsed['has_abstract'] or result['has_abstract']
+            parsed['citations'].update(result['citations'])
+            parsed['cites_all'] = parsed['cites_all'] or result['cites_all']
+            for name in ('bibitems', 'references', 'includes', 'bibliographies'):
+                parsed[name].extend(result[name])
+            parsed['model'].section_headings.extend(result['section_headings'])
+            parsed['model'].reference_years.extend(result['reference_years'])
+            for sentence, unit_line, section in result['findings']:
+                parsed['missing_citations'].append({'sentence': sentence, 'file': abs_file_path,
+                                                    'line': line + unit_line - 1, 'section': section})
+            line += text.count('\n')
+        return parsed
+
+    parsed_files = [parsed for _, parsed in _parse_tex_tree(tex_path, parse_file)]
+    report_data = build_tex_report(parsed_files, base_dir)
+    return {
+        'metadata': report_data['metadata'],
+        'units': units,
+        'missing_sections': report_data['missing_sections'],
+        'unresolved_citations': report_data['unresolved_citations'],
+        'missing_citations': report_data['missing_citations'],
+        'size': {'units': len(units)},
+    }
+
+# --- Diff ---
+
+_VERSION_READERS = {'.pdf': _pdf_version, '.tex': _tex_version}
+
+def _diff_lists(old_items, new_items):
+    old_set, new_set = set(old_items), set(new_items)
+    return {
+        'fixed': [item for item in old_items if item not in new_set],
+        'introduced': [item for item in new_items if item not in old_set],
+        'unchanged': [item for item in new_items if item in old_set],
+    }
+
+def _diff_findings(old_findings, new_findings):
+    """
+    Matches missing-citation findings by sentence fingerprint. A sentence
+    flagged in both versions is unchanged wherever it moved to; unchanged and
+    introduced findings carry their location in the new version, fixed ones
+    their location in the old.
+    """
+    remaining = Counter(sentence_fingerprint(finding['sentence']) for finding in old_findings)
+    introduced, unchanged = [], []
+    for finding in new_findings:
+        fingerprint = sentence_fingerprint(finding['sentence'])
+        if remaining[fingerprint] > 0:
+            remaining[fingerprint] -= 1
+            unchanged.append(finding)
+        else:
+            introduced.append(finding)
+    fixed = []
+    for finding in reversed(old_findings):
+        fingerprint = sentence_fingerprint(finding['sentence'])
+        if remaining[fingerprint] > 0:
+            remaining[fingerprint] -= 1
+            fixed.append(finding)
+    fixed.reverse()
+    return {'fixed': fixed, 'introduced': introduced, 'unchanged': unchanged}
+
+def diff_versions(old_path, new_path, cache=None, phrases=None, section_synonyms=None):
+    """
+    Compares two versions of a paper (both PDF or both LaTeX) and reports
+    which missing-citation sentences, unresolved citations and missing
+    sections were fixed, introduced or left unchanged by the revision.
+
+    Both versions are cut into units at their section headings and each unit
+    is fingerprinted, so sections identical in both versions are analyzed
+    once, and with a ResultCache, sections and PDF pages already seen in an
+    earlier diff are not analyzed or extracted again. 'sections' lists the
+    units of the new version whose content changed and the old ones that are
+    gone; 'reanalyzed' counts the units (and PDF pages) of the new version
+    that had to be analyzed. Units are analyzed independently, so a sentence
+    running across a section heading may be reported slightly differently
+    than by analyze_file. section_synonyms adds PDF section heading
+    synonyms, as for analyze_file.
+    Raises ValueError unless both files have the same supported extension.
+    """
+    extension = os.path.splitext(old_path)[1].lower()
+    if extension not in _VERSION_READERS or os.path.splitext(new_path)[1].lower() != extension:
+        raise ValueError(f"Both versions must be {' or '.join(_VERSION_READERS)} files of the same type.")
+    read_version = _VERSION_READERS[extension]
+    # Loads the analyzer backend (e.g. PyMuPDF) up front, so its import is not timed as part of a version
+    get_analyzer(extension)
+    store = _ResultStore(cache)
+
+    with stage('diff.old_version'):
+        old = read_version(old_path, store, phrases, section_synonyms)
+    store.misses.clear()
+    with stage('diff.new_version'):
+        new = read_version(new_path, store, phrases, section_synonyms)
+    if cache is not None:
+        cache.evict()
+
+    old_keys = {key for _, key in old['units']}
+    new_keys = {key for _, key in new['units']}
+    reanalyzed = {'units': store.misses['unit'], 'of_units': new['size']['units']}
+    if 'pages' in new['size']:
+        reanalyzed.update({'pages': store.misses['page'], 'of_pages': new['size']['pages']})
+    return {
+        'old': {'file': old_path, 'metadata': old['metadata']},
+        'new': {'file': new_path, 'metadata': new['metadata']},
+        'sections': {
+            'changed': [label for label, key in new['units'] if key not in old_keys],
+            'removed': [label for label, key in old['units'] if key not in new_keys],
+            'unchanged': sum(1 for _, key in new['units'] if key in old_keys),
+        },
+        'missing_citations': _diff_findings(old['missing_citations'], new['missing_citations']),
+        'unresolved_citations': _diff_lists(old['unresolved_citations'], new['unresolved_citations']),
+        'missing_sections': _diff_lists(old['missing_sections'], new['missing_sections']),
+        'reanalyzed': reanalyzed,
+    }